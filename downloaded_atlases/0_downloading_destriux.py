@@ -8,13 +8,220 @@ The Destrieux atlas provides 148 cortical parcellation regions.
 Reference: Destrieux, C., et al. (2010). NeuroImage, 53(1), 1-15.
 """
 
+import argparse
+import contextlib
+import inspect
 import os
-import urllib.request
-import zipfile
+import shutil
 from pathlib import Path
+from urllib.parse import urlparse
 
-def download_destrieux_atlas():
-    """Download the Destrieux cortical atlas using nilearn."""
+def _parallel_fetch(url, dest, chunks=8):
+    """Download url to dest using concurrent HTTP/2 byte-range requests.
+
+    Falls back to a single streamed GET when the server does not report a
+    Content-Length or any range comes back incomplete. A server that answers
+    the first range request with 200 instead of 206 has sent the whole file,
+    which is written as-is.
+    """
+    import asyncio
+    import httpx
+
+    dest = Path(dest)
+
+    async def _fetch():
+        async with httpx.AsyncClient(http2=True, follow_redirects=True, timeout=60) as client:
+            head = await client.head(url)
+            head.raise_for_status()
+            size = int(head.headers.get("content-length", 0))
+
+            if size > 0:
+                step = -(-size // chunks)
+                ranges = [(lo, min(lo + step, size) - 1) for lo in range(0, size, step)]
+
+                async def _get_range(lo, hi):
+                    response = await client.get(url, headers={"Range": f"bytes={lo}-{hi}"})
+                    response.raise_for_status()
+                    return lo, hi, response
+
+                # Probe with the first range so a server without range support
+                # only sends the full body once: a 200 reply is the whole file
+                first = await _get_range(*ranges[0])
+                if first[2].status_code == 200 and len(first[2].content) == size:
+                    dest.write_bytes(first[2].content)
+                    return
+                if first[2].status_code == 206:
+                    parts = [first, *await asyncio.gather(*(_get_range(lo, hi) for lo, hi in ranges[1:]))]
+                    # Every part must be the exact range asked for; anything
+                    # else (a 200, a short body) goes to the streamed fallback
+                    if all(response.status_code == 206 and len(response.content) == hi - lo + 1
+                           for lo, hi, response in parts):
+                        fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+                        try:
+                            os.ftruncate(fd, size)
+                            for lo, _, response in parts:
+                                os.pwrite(fd, response.content, lo)
+                        finally:
+                            os.close(fd)
+                        return
+
+            # Single-stream fallback
+            async with client.stream("GET", url) as response:
+                response.raise_for_status()
+                with open(dest, "wb") as f:
+                    async for block in response.aiter_bytes():
+                        f.write(block)
+
+    asyncio.run(_fetch())
+    return dest
+
+@contextlib.contextmanager
+def _nilearn_parallel_downloads():
+    """Route nilearn's single-file downloads through _parallel_fetch.
+
+    nilearn's cache directory layout is preserved: files land where nilearn's
+    own fetcher would have put them, and anything the parallel path cannot
+    handle (authentication, checksums, errors) goes to the original fetcher.
+    Does nothing when httpx is not installed.
+    """
+    try:
+        import httpx  # noqa: F401
+        from nilearn.datasets import _utils as nilearn_utils
+    except ImportError:
+        yield
+        return
+
+    # The fetcher was renamed from _fetch_file to fetch_single_file in nilearn 0.11
+    name = "fetch_single_file" if hasattr(nilearn_utils, "fetch_single_file") else "_fetch_file"
+    original = getattr(nilearn_utils, name, None)
+    if original is None or not hasattr(os, "pwrite"):
+        yield
+        return
+
+    # Older fetchers take no session (or other newer) keyword; only forward
+    # what the original accepts
+    params = inspect.signature(original).parameters
+    takes_any = any(p.kind is p.VAR_KEYWORD for p in params.values())
+    accepted = None if takes_any else set(params)
+
+    def _fetch_file(url, data_dir, resume=True, overwrite=False, md5sum=None,
+                    username=None, password=None, verbose=1, session=None, **kwargs):
+        kwargs.update(resume=resume, overwrite=overwrite, md5sum=md5sum, username=username,
+                      password=password, verbose=verbose, session=session)
+        if accepted is not None:
+            kwargs = {k: v for k, v in kwargs.items() if k in accepted}
+        if username is not None or md5sum is not None:
+            return original(url, data_dir, **kwargs)
+
+        # Same file name as nilearn: the URL basename, or nilearn's md5 of the
+        # path when that is empty (skip the patch if the helper is missing)
+        data_dir = Path(data_dir)
+        url_path = urlparse(url).path
+        file_name = os.path.basename(url_path)
+        if file_name == "":
+            md5_hash = getattr(nilearn_utils, "md5_hash", None) or getattr(nilearn_utils, "_md5_hash", None)
+            if md5_hash is None:
+                return original(url, data_dir, **kwargs)
+            file_name = md5_hash(url_path)
+        full_name = data_dir / file_name
+        if full_name.exists() and not overwrite:
+            return original(url, data_dir, **kwargs)
+
+        data_dir.mkdir(parents=True, exist_ok=True)
+        temp_name = full_name.with_name(full_name.name + ".part")
+        try:
+            _parallel_fetch(url, temp_name)
+        except Exception as e:
+            print(f"   parallel download failed ({e}), falling back to nilearn")
+            temp_name.unlink(missing_ok=True)
+            return original(url, data_dir, **kwargs)
+        temp_name.replace(full_name)
+        return full_name
+
+    setattr(nilearn_utils, name, _fetch_file)
+    try:
+        yield
+    finally:
+        setattr(nilearn_utils, name, original)
+
+def _use_zlib_ng():
+    """Route nibabel's .nii.gz (de)compression through zlib-ng when it is installed.
+
+    zlib-ng ships SIMD CRC32/adler32 and match-finding kernels and is a drop-in
+    replacement for CPython's zlib. Returns True if nibabel was switched over.
+    """
+    try:
+        from zlib_ng import gzip_ng
+        import nibabel.openers
+    except ImportError:
+        return False
+
+    opener = nibabel.openers.Opener
+    gzip_open, arg_names = opener.compress_ext_map[".gz"]
+    if getattr(gzip_open, "uses_zlib_ng", False):
+        return True
+
+    def _gzip_ng_open(filename, mode="rb", compresslevel=9, mtime=0, keep_open=False):
+        # indexed_gzip already gives random access for reads, keep it when present
+        if mode == "rb" and nibabel.openers.HAVE_INDEXED_GZIP:
+            return gzip_open(filename, mode, compresslevel, mtime, keep_open)
+        return gzip_ng.GzipNGFile(filename, mode, compresslevel, mtime=mtime)
+
+    _gzip_ng_open.uses_zlib_ng = True
+    opener.compress_ext_map[".gz"] = (_gzip_ng_open, arg_names)
+    return True
+
+def _has_scaling(img):
+    """Whether img's on-disk data carries a scl_slope/scl_inter.
+
+    A loaded image's header has its scaling reset (get_slope_inter() returns
+    (None, None)); the values live on the array proxy instead.
+    """
+    return getattr(img.dataobj, "slope", 1) != 1 or getattr(img.dataobj, "inter", 0) != 0
+
+def _save_by_slab(img, filename):
+    """Save a 3D image one z-slab at a time so only a slab is held in memory.
+
+    nib.save materialises the whole array before writing; here the data is
+    pulled slab by slab from the on-disk proxy instead. In Fortran order each
+    z-slab is one contiguous run of the file. Scaled or non-3D images, which
+    need nibabel's own array writer, go through nib.save.
+    """
+    import numpy as np
+    import nibabel as nib
+    from nibabel.volumeutils import seek_tell
+
+    if img.ndim != 3 or _has_scaling(img):
+        nib.save(img, filename)
+        return
+
+    img.update_header()
+    header = img.header
+    dtype = header.get_data_dtype()
+    with nib.openers.Opener(str(filename), 'wb') as f:
+        header.write_to(f)
+        seek_tell(f, header.get_data_offset(), write0=True)
+        for z in range(img.shape[2]):
+            slab = np.asarray(img.dataobj[..., z], dtype=dtype)
+            f.write(slab.tobytes(order='F'))
+    img.uncache()
+
+def _link_or_copy(src, dest):
+    """Hard-link src to dest, copying when a link is not possible."""
+    dest.unlink(missing_ok=True)
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copyfile(src, dest)
+
+def download_destrieux_atlas(compresslevel=None):
+    """Download the Destrieux cortical atlas using nilearn.
+
+    nilearn serves the atlas from its own cache (~/nilearn_data) when it was
+    fetched before. By default that cached .nii.gz is hard-linked into place
+    as-is instead of being re-encoded. Passing compresslevel re-encodes it at
+    that gzip level: 1 is the fastest, 6 or higher gives a smaller file.
+    """
 
     # Create download directory if it doesn't exist
     download_dir = Path(__file__).parent
@@ -38,19 +245,43 @@ def download_destrieux_atlas():
         from nilearn.datasets import fetch_atlas_destrieux_2009
         import nibabel as nib
 
-        destrieux = fetch_atlas_destrieux_2009()
+        # Set explicitly: nibabel defaults to 1 but site configs may override it
+        nib.openers.Opener.default_compresslevel = compresslevel or 1
+
+        if _use_zlib_ng():
+            print("⚡ Using zlib-ng for .nii.gz compression")
 
-        # Load and save atlas
-        des_img = nib.load(destrieux.maps)
-        nib.save(des_img, atlas_file)
+        with _nilearn_parallel_downloads():
+            destrieux = fetch_atlas_destrieux_2009()
 
-        # Save labels with proper formatting
-        with open(labels_file, 'w') as f:
-            for i, label in enumerate(destrieux.labels):
-                if i > 0:  # Skip background (0)
-                    f.write(f"{i}: {label}\n")
+        # Load and save atlas (keep_file_open lets indexed_gzip reuse its
+        # seek index instead of re-inflating from the start on every read).
+        # The voxel data stays behind the on-disk proxy and is only read
+        # while saving; mmap is dropped for scaled data, where every read is
+        # type-converted anyway
+        des_img = nib.load(destrieux.maps, mmap=True, keep_file_open=True)
+        if _has_scaling(des_img):
+            des_img = nib.load(destrieux.maps, mmap=False, keep_file_open=True)
+        if compresslevel is None and str(destrieux.maps).endswith(".nii.gz"):
+            _link_or_copy(Path(destrieux.maps), atlas_file)
+        else:
+            # Unlink first: writing through a hard link would rewrite nilearn's cache
+            atlas_file.unlink(missing_ok=True)
+            _save_by_slab(des_img, atlas_file)
 
-        print(f"✅ Destrieux atlas downloaded: {des_img.shape} voxels")
+        # Save labels with proper formatting, encoded once and written with a
+        # single raw write (index 0 is the background and is skipped)
+        payload = "".join(f"{i}: {label}\n" for i, label in enumerate(destrieux.labels) if i > 0).encode("utf-8")
+        fd = os.open(labels_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            view = memoryview(payload)
+            while view:
+                view = view[os.write(fd, view):]
+        finally:
+            os.close(fd)
+
+        # Header-only access, never touches the voxel data
+        print(f"✅ Destrieux atlas downloaded: {des_img.header.get_data_shape()} voxels")
         print(f"   Regions: {len(destrieux.labels)-1} cortical areas")
         print(f"   Atlas saved: {atlas_file}")
         print(f"   Labels saved: {labels_file}")
@@ -89,8 +320,16 @@ Required files:
 
     return destrieux_dir
 
+def parse_args():
+    p = argparse.ArgumentParser(description="Step 0: Download Destrieux Atlas")
+    p.add_argument("--compresslevel", type=int, default=None, choices=range(1, 10),
+                   help="re-encode the saved .nii.gz at this gzip level (1 = fastest, 9 = smallest) "
+                        "instead of linking nilearn's cached copy")
+    return p.parse_args()
+
 if __name__ == "__main__":
-    download_dir = download_destrieux_atlas()
+    args = parse_args()
+    download_dir = download_destrieux_atlas(compresslevel=args.compresslevel)
     print(f"\n🎯 Next steps:")
     print(f"   1. Obtain Destrieux atlas files (see instructions)")
     print(f"   2. Place them in: {download_dir}")
@@ -7,16 +7,22 @@ This script installs all required Python packages for the Levtiades Atlas pipeli
 Run this script first before running the atlas creation steps.
 
 Usage:
-    python install/install_python_deps.py
+    python install/install_python_deps.py [--deep]
 
 Requirements:
     - Python 3.8+
     - pip package manager
 """
 
+import argparse
+import hashlib
+import importlib
+import importlib.util
+import re
 import subprocess
 import sys
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 def check_python_version():
@@ -39,27 +45,86 @@ def install_requirements():
         print(f"❌ Requirements file not found: {requirements_file}")
         return False
 
+    # Skip pip entirely when this exact requirements file was already installed
+    # into this interpreter
+    install_dir = requirements_file.parent
+    digest = hashlib.sha256(requirements_file.read_bytes() + sys.executable.encode()).hexdigest()
+    stamp = install_dir / f".installed.{digest}"
+
+    if stamp.exists():
+        print("✅ Requirements unchanged since last install - skipping pip")
+        return True
+
     print("📦 Installing Python dependencies...")
     print(f"   Reading requirements from: {requirements_file}")
 
     try:
         # Install packages
-        cmd = [sys.executable, "-m", "pip", "install", "-r", str(requirements_file)]
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        pip_args = ["install", "--prefer-binary", "-r", str(requirements_file)]
+        if not sys.stdout.isatty():
+            pip_args.append("--progress-bar=off")
+
+        returncode = _run_pip(pip_args, requirements_file)
 
-        if result.returncode == 0:
+        if returncode == 0:
+            for old_stamp in install_dir.glob(".installed.*"):
+                old_stamp.unlink()
+            stamp.touch()
             print("✅ All Python dependencies installed successfully!")
             return True
         else:
-            print("❌ Error installing dependencies:")
-            print(result.stderr)
+            print(f"❌ Error installing dependencies (pip exited with {returncode}, see output above)")
             return False
 
     except Exception as e:
         print(f"❌ Error during installation: {e}")
         return False
 
-def test_imports():
+def _run_pip(pip_args, requirements_file):
+    """Run pip and return its exit code
+
+    pip is run inside this interpreter when its CLI entry point is importable,
+    saving a second interpreter start. A subprocess is used instead when pip
+    is missing or the requirements would upgrade pip itself, since a running
+    pip cannot safely replace its own modules.
+    """
+    upgrades_pip = any(
+        re.match(r"pip\b", line.strip(), re.IGNORECASE)
+        for line in requirements_file.read_text().splitlines()
+    )
+
+    if not upgrades_pip:
+        try:
+            from pip._internal.cli.main import main as pip_main
+        except ImportError:
+            pass
+        else:
+            returncode = pip_main(pip_args)
+            # Newly installed packages must be visible to the import checks
+            importlib.invalidate_caches()
+            return returncode
+
+    # Inherit stdout/stderr so pip's progress shows live instead of being
+    # buffered in memory until it exits
+    return subprocess.run([sys.executable, "-m", "pip", *pip_args], check=False).returncode
+
+def _try_import(package, deep=False):
+    """Check a package is importable, returning (package, exception or None)
+
+    By default only the import system's finders are asked (find_spec), which
+    does not run the package's top-level code; deep=True really imports it,
+    and any error raised by that top-level code counts as a failed import.
+    """
+    try:
+        if deep:
+            importlib.import_module(package)
+        elif importlib.util.find_spec(package) is None:
+            raise ModuleNotFoundError(f"No module named '{package}'")
+        return package, None
+    except (Exception if deep else ImportError) as e:
+        return package, e
+
+def test_imports(deep=False):
     """Test that key packages can be imported"""
 
     print("\n🔍 Testing package imports...")
@@ -68,6 +133,7 @@ def test_imports():
         "nibabel",
         "nilearn",
         "templateflow",
+        "indexed_gzip",
         "numpy",
         "scipy",
         "pandas",
@@ -77,12 +143,20 @@ def test_imports():
 
     failed_imports = []
 
-    for package in test_packages:
-        try:
-            __import__(package)
+    # Lookups are mostly disk I/O, so threads overlap them; map keeps the
+    # order. Real imports run one at a time: packages sharing dependencies
+    # can see each other half-initialised when imported concurrently
+    if deep:
+        results = [_try_import(package, deep=True) for package in test_packages]
+    else:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(_try_import, test_packages))
+
+    for package, error in results:
+        if error is None:
             print(f"   ✅ {package}")
-        except ImportError as e:
-            print(f"   ❌ {package}: {e}")
+        else:
+            print(f"   ❌ {package}: {error}")
             failed_imports.append(package)
 
     if failed_imports:
@@ -93,9 +167,17 @@ def test_imports():
     print("\n✅ All packages imported successfully!")
     return True
 
+def parse_args():
+    p = argparse.ArgumentParser(description="Install Python Dependencies for Levtiades Atlas Pipeline")
+    p.add_argument("--deep", action="store_true",
+                   help="Fully import each package instead of only locating it")
+    return p.parse_args()
+
 def main():
     """Main installation function"""
 
+    args = parse_args()
+
     print("🧠 LEVTIADES ATLAS - PYTHON DEPENDENCIES INSTALLER")
     print("=" * 60)
 
@@ -108,7 +190,7 @@ def main():
         return 1
 
     # Test imports
-    if not test_imports():
+    if not test_imports(deep=args.deep):
         return 1
 
     print("\n🎉 Python environment setup complete!")
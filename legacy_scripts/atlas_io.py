@@ -0,0 +1,45 @@
+"""
+Atlas loading shared by csv_and_validate.py and create_csv_and_validate.py
+"""
+
+import nibabel as nib
+import numpy as np
+from pathlib import Path
+
+def load_atlas(path):
+    """Load a label image, returning (img, data) with data in a compact integer dtype
+    
+    Float labels are truncated into the smallest unsigned type holding them;
+    NaN, infinite or negative values are not labels and raise ValueError.
+    """
+    img = nib.load(path, keep_file_open=True)
+    data = np.asanyarray(img.dataobj)
+    if not np.issubdtype(data.dtype, np.integer):
+        lo, hi = data.min(), data.max()
+        if not (np.isfinite(lo) and np.isfinite(hi)) or lo < 0:
+            raise ValueError(f"{path}: labels must be finite and non-negative (range {lo} to {hi})")
+        data = data.astype(np.min_scalar_type(int(hi)))
+    return img, data
+
+CACHE_DIR = Path("levtiades_atlas/_cache")
+
+def load_atlas_cached(path, cache_dir=CACHE_DIR):
+    """load_atlas, with the voxel data cached as .npy under cache_dir
+    
+    The cache is used while it is newer than the image and is memory-mapped,
+    so reruns skip decompressing the .nii.gz; the image itself is only opened
+    for its header and affine.
+    """
+    path = Path(path)
+    cache = cache_dir / (path.name.split('.')[0] + '.npy')
+    if cache.exists() and cache.stat().st_mtime > path.stat().st_mtime:
+        return nib.load(path), np.load(cache, mmap_mode='r')
+    
+    img, data = load_atlas(path)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    # Write to a temporary file first so an interrupted save is never picked up
+    tmp = cache.with_suffix('.tmp')
+    with open(tmp, 'wb') as f:
+        np.save(f, data)
+    tmp.replace(cache)
+    return img, data
@@ -9,9 +9,107 @@ import numpy as np
 from pathlib import Path
 import pandas as pd
 from scipy import ndimage
+import argparse
+import functools
+import gzip
+import io
 import json
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
-def create_correct_hemisphere_atlas():
+try:
+    import numba
+except ImportError:
+    numba = None
+
+if numba is not None:
+    @numba.njit(parallel=True, cache=True)
+    def _remap_and_accumulate_kernel(data, lut, n_labels, remap):
+        nx, ny, nz = data.shape
+        out = np.empty(data.shape if remap else (0, 0, 0), dtype=lut.dtype)
+        # Accumulate per z-slab (one per prange thread) and sum at the end
+        counts = np.zeros((nz, n_labels), dtype=np.int64)
+        sums = np.zeros((nz, n_labels, 3), dtype=np.float64)
+        for k in numba.prange(nz):
+            for j in range(ny):
+                for i in range(nx):
+                    label = lut[data[i, j, k]]
+                    if remap:
+                        out[i, j, k] = label
+                    counts[k, label] += 1
+                    sums[k, label, 0] += i
+                    sums[k, label, 1] += j
+                    sums[k, label, 2] += k
+        return out, counts.sum(axis=0), sums.sum(axis=0)
+
+def remap_and_accumulate(data, lut=None):
+    """Relabel data through lut and accumulate per-label statistics in one pass
+
+    Returns (remapped data, voxel counts, voxel coordinate sums), the last two
+    indexed by new label. With lut=None labels are kept and the remapped data
+    is data itself. Uses a fused numba kernel when numba is installed.
+    """
+    if numba is not None:
+        remap = lut is not None
+        if not remap:
+            lut = np.arange(int(data.max()) + 1, dtype=np.int32)
+        out, counts, sums = _remap_and_accumulate_kernel(data, lut, int(lut.max()) + 1, remap)
+        return (out if remap else data), counts, sums
+    
+    out = data if lut is None else lut[data]
+    flat = out.ravel()
+    counts = np.bincount(flat)
+    coords = np.indices(data.shape, dtype=np.int32).reshape(3, -1)
+    sums = np.stack([np.bincount(flat, weights=c, minlength=counts.size) for c in coords], axis=1)
+    return out, counts, sums
+
+def label_centroids(counts, sums, affine):
+    """MNI centroids from the counts and coordinate sums of remap_and_accumulate"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        com_voxel = sums / counts[:, None]
+    return com_voxel @ affine[:3, :3].T + affine[:3, 3]
+
+def compute_label_centroids(data, affine):
+    """Voxel counts and MNI centroids for every label in one pass
+    
+    Returns (counts, centroids) indexed by label value. Labels without voxels
+    have a count of 0 and NaN centroids.
+    """
+    _, counts, sums = remap_and_accumulate(data)
+    return counts, label_centroids(counts, sums, affine)
+
+ATLAS_PATH = Path("levtiades_atlas/final_atlas/no_overlaps/levtiades_sequential.nii.gz")
+MAPPING_PATH = Path("levtiades_atlas/index_mapping_reference.csv")
+TIAN_LABEL_PATH = Path("data/Tian2020MSA_v1.4/3T/Subcortex-Only/Tian_Subcortex_S4_3T_label.txt")
+
+def load_atlas(path):
+    """Load a label image, returning (img, data) with data in its stored dtype"""
+    img = nib.load(path)
+    data = np.asanyarray(img.dataobj)
+    if not np.issubdtype(data.dtype, np.integer):
+        data = data.astype(int)
+    return img, data
+
+@functools.lru_cache(maxsize=1)
+def load_mapping(path=MAPPING_PATH):
+    """Index mapping reference table, read once per run (treat as read-only)"""
+    return pd.read_csv(path)
+
+@functools.lru_cache(maxsize=1)
+def load_tian_labels(path=TIAN_LABEL_PATH):
+    """Tian region names keyed by original Tian index (1-54), read once per run"""
+    tian_labels = {}
+    if path.exists():
+        with open(path, 'r') as f:
+            for i, line in enumerate(f, 1):
+                label = line.strip()
+                if label:
+                    tian_labels[i] = label
+    return tian_labels
+
+def create_correct_hemisphere_atlas(atlas_img, atlas_data):
     """Create atlas with CORRECT hemisphere ordering"""
     
     print("🔄 CREATING CORRECTED HEMISPHERE LEVTIADES ATLAS")
@@ -22,23 +120,11 @@ def create_correct_hemisphere_atlas():
     print("Order: Levinson → Tian-LEFT → Tian-RIGHT → Destrieux-LEFT → Destrieux-RIGHT")
     print()
     
-    # Load current atlas
-    atlas_path = Path("levtiades_atlas/final_atlas/no_overlaps/levtiades_sequential.nii.gz")
-    atlas_img = nib.load(atlas_path)
-    atlas_data = atlas_img.get_fdata().astype(int)
-    
     # Load original mapping
-    mapping_df = pd.read_csv("levtiades_atlas/index_mapping_reference.csv")
+    mapping_df = load_mapping()
     
     # Load Tian labels to verify hemisphere assignment
-    tian_labels = {}
-    tian_file = Path("data/Tian2020MSA_v1.4/3T/Subcortex-Only/Tian_Subcortex_S4_3T_label.txt")
-    if tian_file.exists():
-        with open(tian_file, 'r') as f:
-            for i, line in enumerate(f, 1):
-                label = line.strip()
-                if label:
-                    tian_labels[i] = label
+    tian_labels = load_tian_labels()
     
     # Create CORRECT hemisphere mapping
     hemisphere_map = {}
@@ -48,9 +134,9 @@ def create_correct_hemisphere_atlas():
     
     # 1. Levinson regions (1-5)
     levinson_rows = mapping_df[mapping_df['source'] == 'Levinson'].sort_values('new_index')
-    for _, row in levinson_rows.iterrows():
-        hemisphere_map[row['new_index']] = new_index
-        print(f"   Levinson {row['new_index']} -> {new_index}")
+    for old_idx in levinson_rows['new_index']:
+        hemisphere_map[old_idx] = new_index
+        print(f"   Levinson {old_idx} -> {new_index}")
         new_index += 1
     
     # 2. Tian LEFT hemisphere (original Tian indices 28-54, which are sequential indices 128-154 in old system)
@@ -59,70 +145,71 @@ def create_correct_hemisphere_atlas():
     
     # Add hemisphere info based on original Tian index
     tian_rows['tian_original_idx'] = tian_rows['old_index'] - 100  # Convert 101-154 to 1-54
-    tian_rows['hemisphere'] = tian_rows['tian_original_idx'].apply(
-        lambda x: 'left' if x >= 28 else 'right'
-    )
+    tian_rows['hemisphere'] = np.where(tian_rows['tian_original_idx'] >= 28, 'left', 'right')
     
     # Tian LEFT (original 28-54)
     tian_left = tian_rows[tian_rows['hemisphere'] == 'left'].sort_values('old_index')
     print(f"\n   Tian LEFT regions (original indices 28-54):")
-    for _, row in tian_left.iterrows():
-        tian_orig_idx = row['tian_original_idx']
+    for old_idx, tian_orig_idx in zip(tian_left['new_index'], tian_left['tian_original_idx']):
         label = tian_labels.get(tian_orig_idx, f"Tian_{tian_orig_idx}")
-        hemisphere_map[row['new_index']] = new_index
-        print(f"     {row['new_index']} ({label}) -> {new_index}")
+        hemisphere_map[old_idx] = new_index
+        print(f"     {old_idx} ({label}) -> {new_index}")
         new_index += 1
     
     # 3. Tian RIGHT hemisphere (original 1-27)
     tian_right = tian_rows[tian_rows['hemisphere'] == 'right'].sort_values('old_index')
     print(f"\n   Tian RIGHT regions (original indices 1-27):")
-    for _, row in tian_right.iterrows():
-        tian_orig_idx = row['tian_original_idx']
+    for old_idx, tian_orig_idx in zip(tian_right['new_index'], tian_right['tian_original_idx']):
         label = tian_labels.get(tian_orig_idx, f"Tian_{tian_orig_idx}")
-        hemisphere_map[row['new_index']] = new_index
-        print(f"     {row['new_index']} ({label}) -> {new_index}")
+        hemisphere_map[old_idx] = new_index
+        print(f"     {old_idx} ({label}) -> {new_index}")
         new_index += 1
     
     # 4. Destrieux LEFT hemisphere
     des_rows = mapping_df[mapping_df['source'] == 'Destrieux'].sort_values('new_index')
-    des_left = des_rows[des_rows['region_name'].str.contains("'L ", na=False)]
+    # Hemisphere letter from the region name, parsed once for both sides
+    des_hemi = des_rows['region_name'].str.extract(r"'([LR]) ", expand=False)
+    des_left = des_rows[des_hemi == 'L']
     print(f"\n   Destrieux LEFT regions:")
-    for _, row in des_left.iterrows():
-        hemisphere_map[row['new_index']] = new_index
-        new_index += 1
+    hemisphere_map.update(zip(des_left['new_index'], range(new_index, new_index + len(des_left))))
+    new_index += len(des_left)
     print(f"     {len(des_left)} regions -> {new_index-len(des_left)}-{new_index-1}")
     
     # 5. Destrieux RIGHT hemisphere  
-    des_right = des_rows[des_rows['region_name'].str.contains("'R ", na=False)]
+    des_right = des_rows[des_hemi == 'R']
     print(f"\n   Destrieux RIGHT regions:")
-    for _, row in des_right.iterrows():
-        hemisphere_map[row['new_index']] = new_index
-        new_index += 1
+    hemisphere_map.update(zip(des_right['new_index'], range(new_index, new_index + len(des_right))))
+    new_index += len(des_right)
     print(f"     {len(des_right)} regions -> {new_index-len(des_right)}-{new_index-1}")
     
     print(f"\n✅ Created CORRECTED hemisphere mapping for {len(hemisphere_map)} regions")
     
     # Apply hemisphere reordering
     print("\n🏗️ Applying CORRECTED Hemisphere Reordering...")
-    new_atlas_data = np.zeros_like(atlas_data, dtype=np.int16)
-    
-    for old_idx, new_idx in hemisphere_map.items():
-        mask = atlas_data == old_idx
-        new_atlas_data[mask] = new_idx
+    # Single gather through a lookup table instead of one masked pass per label
+    old_indices = np.fromiter(hemisphere_map.keys(), dtype=np.int32)
+    new_indices = np.fromiter(hemisphere_map.values(), dtype=np.int32)
+    # Final labels fit in uint8, half the size of the int16 input atlas
+    assert new_indices.max() < 256, "uint8 atlas cannot hold more than 255 labels"
+    lut = np.zeros(max(int(atlas_data.max()), int(old_indices.max())) + 1, dtype=np.uint8)
+    lut[old_indices] = new_indices
+    new_atlas_data, new_counts, _ = remap_and_accumulate(atlas_data, lut)
     
     # Verify no data loss
     old_voxels = np.sum(atlas_data > 0)
-    new_voxels = np.sum(new_atlas_data > 0)
+    new_voxels = new_counts[1:].sum()
     print(f"   Verification: {old_voxels} -> {new_voxels} voxels")
     
     if old_voxels != new_voxels:
         print("❌ ERROR: Voxel count mismatch!")
-        return None, None
+        return None, None, None
     
     # Save corrected atlas (overwrite existing)
-    new_img = nib.Nifti1Image(new_atlas_data, atlas_img.affine, atlas_img.header)
-    nib.save(new_img, atlas_path)
-    print(f"✅ Overwritten: {atlas_path}")
+    new_header = atlas_img.header.copy()
+    new_header.set_data_dtype(np.uint8)
+    new_img = nib.Nifti1Image(new_atlas_data, atlas_img.affine, new_header)
+    nib.save(new_img, ATLAS_PATH)
+    print(f"✅ Overwritten: {ATLAS_PATH}")
     
     # Save corrected hemisphere mapping
     with open("levtiades_atlas/hemisphere_reorder_map_corrected.json", 'w') as f:
@@ -130,146 +217,95 @@ def create_correct_hemisphere_atlas():
     
     return new_atlas_data, new_img, hemisphere_map
 
-def validate_corrected_atlas(hemisphere_map):
+# (source, aligned atlas file names, index offset in the mapping table,
+#  final indices, print each distance)
+VALIDATION_SOURCES = [
+    ('Levinson', ["levinson_combined_aligned.nii.gz", "levinson_aligned.nii.gz"], 0, range(1, 6), True),
+    ('Tian', ["tian_aligned.nii.gz"], 100, range(6, 60), False),  # 101-154 -> 1-54
+    ('Destrieux', ["destrieux_aligned.nii.gz"], 200, range(60, 208), False),  # 201-348 -> 1-148
+]
+
+def validate_source(source, path, index_offset, final_indices,
+                    corrected_centroids, mapping_by_new, reverse_hemisphere):
+    """Compare corrected-atlas centroids of one source with its aligned atlas"""
+    
+    src_img, src_data = load_atlas(path)
+    src_counts, src_centroids = compute_label_centroids(src_data, src_img.affine)
+    
+    results = []
+    for new_idx in final_indices:
+        old_seq_idx = reverse_hemisphere.get(new_idx)
+        if old_seq_idx is None or old_seq_idx not in mapping_by_new.index:
+            continue
+        orig_idx = mapping_by_new.loc[old_seq_idx, 'old_index'] - index_offset
+        
+        if 0 < orig_idx < src_counts.size and src_counts[orig_idx] > 0:
+            com_mni = src_centroids[orig_idx]
+            
+            corrected_coord = corrected_centroids[new_idx]
+            distance = np.sqrt(np.sum((com_mni - corrected_coord)**2))
+            
+            results.append({
+                'final_index': new_idx,
+                'source': source,
+                'original_x': round(com_mni[0], 1),
+                'original_y': round(com_mni[1], 1),
+                'original_z': round(com_mni[2], 1),
+                'corrected_x': round(corrected_coord[0], 1),
+                'corrected_y': round(corrected_coord[1], 1),
+                'corrected_z': round(corrected_coord[2], 1),
+                'distance_mm': round(distance, 2),
+                'match': 'MATCH' if distance < 1.0 else 'MISMATCH'
+            })
+    return results
+
+def validate_corrected_atlas(atlas_img, atlas_data, hemisphere_map):
     """Validate ALL regions with corrected mapping"""
     
     print("\n🔍 VALIDATING CORRECTED ATLAS - ALL REGIONS")
     print("=" * 50)
     
-    # Load atlas
-    atlas_path = Path("levtiades_atlas/final_atlas/no_overlaps/levtiades_sequential.nii.gz")
-    atlas_img = nib.load(atlas_path)
-    atlas_data = atlas_img.get_fdata().astype(int)
     affine = atlas_img.affine
     
     # Get centroids from corrected atlas
     print("📍 Extracting centroids from corrected atlas...")
-    corrected_centroids = {}
-    unique_labels = sorted(np.unique(atlas_data[atlas_data > 0]))
-    
-    for label in unique_labels:
-        mask = atlas_data == label
-        com_voxel = ndimage.center_of_mass(mask)
-        com_mni = nib.affines.apply_affine(affine, com_voxel)
-        corrected_centroids[label] = com_mni
+    counts, centroids = compute_label_centroids(atlas_data, affine)
+    corrected_centroids = {label: centroids[label] for label in np.flatnonzero(counts) if label > 0}
     
     print(f"✅ Extracted {len(corrected_centroids)} centroids")
     
-    # Load original mapping and create reverse map
-    mapping_df = pd.read_csv("levtiades_atlas/index_mapping_reference.csv")
+    # Load original mapping (indexed by sequential index for O(1) lookups)
+    # and create reverse map
+    mapping_df = load_mapping()
+    mapping_by_new = mapping_df.set_index('new_index', drop=False)
     reverse_hemisphere = {v: k for k, v in hemisphere_map.items()}
     
-    validation_results = []
     aligned_dir = Path("levtiades_atlas/aligned_atlases")
     
-    # Validate ALL Levinson (1-5)
-    print("\n📍 Validating ALL Levinson regions...")
-    levinson_path = aligned_dir / "levinson_combined_aligned.nii.gz"
-    if not levinson_path.exists():
-        # Try alternative name
-        levinson_path = aligned_dir / "levinson_aligned.nii.gz"
-    
-    if levinson_path.exists():
-        lev_img = nib.load(levinson_path)
-        lev_data = lev_img.get_fdata().astype(int)
-        lev_affine = lev_img.affine
-        
-        for new_idx in range(1, 6):
-            old_seq_idx = reverse_hemisphere[new_idx]
-            orig_row = mapping_df[mapping_df['new_index'] == old_seq_idx].iloc[0]
-            orig_idx = orig_row['old_index']
-            
-            mask = lev_data == orig_idx
-            if np.any(mask):
-                com_voxel = ndimage.center_of_mass(mask)
-                com_mni = nib.affines.apply_affine(lev_affine, com_voxel)
-                
-                corrected_coord = corrected_centroids[new_idx]
-                distance = np.sqrt(np.sum((com_mni - corrected_coord)**2))
-                
-                validation_results.append({
-                    'final_index': new_idx,
-                    'source': 'Levinson',
-                    'original_x': round(com_mni[0], 1),
-                    'original_y': round(com_mni[1], 1), 
-                    'original_z': round(com_mni[2], 1),
-                    'corrected_x': round(corrected_coord[0], 1),
-                    'corrected_y': round(corrected_coord[1], 1),
-                    'corrected_z': round(corrected_coord[2], 1),
-                    'distance_mm': round(distance, 2),
-                    'match': 'MATCH' if distance < 1.0 else 'MISMATCH'
-                })
-                print(f"   Levinson {new_idx}: {distance:.2f}mm")
-    
-    # Validate ALL Tian (6-59)
-    print("\n📍 Validating ALL Tian regions...")
-    tian_path = aligned_dir / "tian_aligned.nii.gz" 
-    if tian_path.exists():
-        tian_img = nib.load(tian_path)
-        tian_data = tian_img.get_fdata().astype(int)
-        tian_affine = tian_img.affine
-        
-        for new_idx in range(6, 60):
-            old_seq_idx = reverse_hemisphere[new_idx]
-            orig_row = mapping_df[mapping_df['new_index'] == old_seq_idx].iloc[0]
-            orig_tian_idx = orig_row['old_index'] - 100  # Convert to 1-54
-            
-            mask = tian_data == orig_tian_idx
-            if np.any(mask):
-                com_voxel = ndimage.center_of_mass(mask)
-                com_mni = nib.affines.apply_affine(tian_affine, com_voxel)
-                
-                corrected_coord = corrected_centroids[new_idx]
-                distance = np.sqrt(np.sum((com_mni - corrected_coord)**2))
-                
-                validation_results.append({
-                    'final_index': new_idx,
-                    'source': 'Tian',
-                    'original_x': round(com_mni[0], 1),
-                    'original_y': round(com_mni[1], 1),
-                    'original_z': round(com_mni[2], 1),
-                    'corrected_x': round(corrected_coord[0], 1),
-                    'corrected_y': round(corrected_coord[1], 1),
-                    'corrected_z': round(corrected_coord[2], 1),
-                    'distance_mm': round(distance, 2),
-                    'match': 'MATCH' if distance < 1.0 else 'MISMATCH'
-                })
-    
-    # Validate ALL Destrieux (60-207)
-    print("\n📍 Validating ALL Destrieux regions...")
-    des_path = aligned_dir / "destrieux_aligned.nii.gz"
-    if des_path.exists():
-        des_img = nib.load(des_path)
-        des_data = des_img.get_fdata().astype(int)
-        des_affine = des_img.affine
+    # The three sources are independent: load and measure them concurrently,
+    # then report in the usual order. The numba kernel is already parallel and
+    # its default threading layer aborts on concurrent launches, so with numba
+    # the sources run one at a time
+    max_workers = 1 if numba is not None else len(VALIDATION_SOURCES)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = []
+        for source, filenames, index_offset, final_indices, _ in VALIDATION_SOURCES:
+            # First existing file name wins (Levinson has an alternative name)
+            path = next((aligned_dir / name for name in filenames if (aligned_dir / name).exists()), None)
+            futures.append(path and executor.submit(
+                validate_source, source, path, index_offset, final_indices,
+                corrected_centroids, mapping_by_new, reverse_hemisphere))
         
-        for new_idx in range(60, 208):
-            if new_idx in reverse_hemisphere:
-                old_seq_idx = reverse_hemisphere[new_idx]
-                orig_row = mapping_df[mapping_df['new_index'] == old_seq_idx]
-                if not orig_row.empty:
-                    orig_des_idx = orig_row.iloc[0]['old_index'] - 200
-                    
-                    mask = des_data == orig_des_idx
-                    if np.any(mask):
-                        com_voxel = ndimage.center_of_mass(mask)
-                        com_mni = nib.affines.apply_affine(des_affine, com_voxel)
-                        
-                        corrected_coord = corrected_centroids[new_idx]
-                        distance = np.sqrt(np.sum((com_mni - corrected_coord)**2))
-                        
-                        validation_results.append({
-                            'final_index': new_idx,
-                            'source': 'Destrieux',
-                            'original_x': round(com_mni[0], 1),
-                            'original_y': round(com_mni[1], 1),
-                            'original_z': round(com_mni[2], 1),
-                            'corrected_x': round(corrected_coord[0], 1),
-                            'corrected_y': round(corrected_coord[1], 1),
-                            'corrected_z': round(corrected_coord[2], 1),
-                            'distance_mm': round(distance, 2),
-                            'match': 'MATCH' if distance < 1.0 else 'MISMATCH'
-                        })
+        validation_results = []
+        for (source, _, _, _, report_each), future in zip(VALIDATION_SOURCES, futures):
+            print(f"\n📍 Validating ALL {source} regions...")
+            if future is None:
+                continue
+            source_results = future.result()
+            if report_each:
+                for r in source_results:
+                    print(f"   {source} {r['final_index']}: {r['distance_mm']:.2f}mm")
+            validation_results.extend(source_results)
     
     # Save validation results
     val_df = pd.DataFrame(validation_results)
@@ -297,29 +333,23 @@ def validate_corrected_atlas(hemisphere_map):
     
     return val_df
 
-def update_corrected_files(hemisphere_map):
+def update_corrected_files(atlas_img, atlas_data, hemisphere_map):
     """Update all files with corrected hemisphere mapping"""
     
     print("\n📋 UPDATING FILES WITH CORRECTED MAPPING...")
     
-    # Load atlas
-    atlas_path = Path("levtiades_atlas/final_atlas/no_overlaps/levtiades_sequential.nii.gz")
-    atlas_img = nib.load(atlas_path)
-    atlas_data = atlas_img.get_fdata().astype(int)
     affine = atlas_img.affine
     
-    # Load mappings
-    mapping_df = pd.read_csv("levtiades_atlas/index_mapping_reference.csv")
+    # Load mappings (indexed by sequential index for O(1) lookups)
+    mapping_df = load_mapping()
+    mapping_by_new = mapping_df.set_index('new_index', drop=False)
     
     # Load Tian labels
-    tian_labels = {}
-    tian_file = Path("data/Tian2020MSA_v1.4/3T/Subcortex-Only/Tian_Subcortex_S4_3T_label.txt")
-    if tian_file.exists():
-        with open(tian_file, 'r') as f:
-            for i, line in enumerate(f, 1):
-                label = line.strip()
-                if label:
-                    tian_labels[i] = label
+    tian_labels = load_tian_labels()
+    
+    # Voxel counts and centroids of all regions in one pass
+    counts, centroids = compute_label_centroids(atlas_data, affine)
+    voxel_volume = abs(np.linalg.det(affine[:3, :3]))  # mm3, 8 for 2mm isotropic
     
     # Create corrected data
     reverse_hemisphere = {v: k for k, v in hemisphere_map.items()}
@@ -328,13 +358,11 @@ def update_corrected_files(hemisphere_map):
     for new_idx in range(1, 208):
         if new_idx in reverse_hemisphere:
             old_seq_idx = reverse_hemisphere[new_idx]
-            orig_row = mapping_df[mapping_df['new_index'] == old_seq_idx].iloc[0]
+            orig_row = mapping_by_new.loc[old_seq_idx]
             
             # Get coordinates
-            mask = atlas_data == new_idx
-            if np.any(mask):
-                com_voxel = ndimage.center_of_mass(mask)
-                com_mni = nib.affines.apply_affine(affine, com_voxel)
+            if new_idx < counts.size and counts[new_idx] > 0:
+                com_mni = centroids[new_idx]
                 
                 # Get proper name
                 source = orig_row['source']
@@ -355,8 +383,8 @@ def update_corrected_files(hemisphere_map):
                     'mni_x': round(com_mni[0], 1),
                     'mni_y': round(com_mni[1], 1),
                     'mni_z': round(com_mni[2], 1),
-                    'volume_voxels': int(np.sum(mask)),
-                    'volume_mm3': int(np.sum(mask)) * 8
+                    'volume_voxels': int(counts[new_idx]),
+                    'volume_mm3': int(round(counts[new_idx] * voxel_volume))
                 })
     
     # Update CSV files
@@ -375,57 +403,109 @@ def update_corrected_files(hemisphere_map):
         f.write("# Order: Levinson → Tian-LEFT → Tian-RIGHT → Destrieux-LEFT → Destrieux-RIGHT\\n")
         f.write("# Format: ID: Region_Name [Source_Atlas]\\n\\n")
         
-        for _, row in corrected_df.iterrows():
-            f.write(f"{row['index']}: {row['region_name']} [{row['source_atlas']}]\\n")
+        for index, name, source in zip(corrected_df['index'], corrected_df['region_name'], corrected_df['source_atlas']):
+            f.write(f"{index}: {name} [{source}]\\n")
     
     print("✅ Updated all files with CORRECTED hemisphere mapping")
 
-def create_individual_rois():
+def _save_roi(sub_mask, sl, shape, header_bytes, path):
+    """Save one ROI given its mask cropped to the bounding box sl
+    
+    header_bytes is the encoded NIfTI header shared by every ROI; the voxel
+    data follows it in Fortran order, as nibabel would write it.
+    """
+    roi_mask = np.zeros(shape, dtype=np.uint8, order='F')
+    roi_mask[sl] = sub_mask
+    if path.suffix == ".gz":
+        f = gzip.GzipFile(path, 'wb', compresslevel=1, mtime=0)
+    else:
+        f = open(path, 'wb')
+    with f:
+        f.write(header_bytes)
+        f.write(roi_mask.T)  # C-contiguous view of the Fortran-ordered bytes
+    return path
+
+def create_individual_rois(atlas_img, atlas_data):
     """Create individual ROI files in 'individual_rois' folder"""
     
     print("\n🎯 Creating Individual ROI Files...")
     
-    atlas_path = Path("levtiades_atlas/final_atlas/no_overlaps/levtiades_sequential.nii.gz")
-    atlas_img = nib.load(atlas_path)
-    atlas_data = atlas_img.get_fdata().astype(int)
-    
     # Create individual_rois directory (overwrite existing)
     roi_dir = Path("levtiades_atlas/individual_rois")
     if roi_dir.exists():
-        import shutil
         shutil.rmtree(roi_dir)
     roi_dir.mkdir()
     
-    unique_labels = sorted(np.unique(atlas_data[atlas_data > 0]))
-    
-    for label in unique_labels:
-        roi_mask = (atlas_data == label).astype(np.uint8)
-        if np.sum(roi_mask) > 0:
-            roi_img = nib.Nifti1Image(roi_mask, atlas_img.affine, atlas_img.header)
-            filename = f"levtiades_roi_{label:03d}.nii.gz"
-            nib.save(roi_img, roi_dir / filename)
-    
-    print(f"✅ Created {len(unique_labels)} ROI files in individual_rois/")
+    # With pigz available, write raw .nii and compress them all afterwards
+    # with multi-threaded gzip; otherwise nibabel writes .nii.gz directly
+    # (at its fastest default level)
+    pigz = shutil.which("pigz")
+    suffix = ".nii" if pigz else ".nii.gz"
+    
+    # Bounding box of every label in one pass; each ROI is then built from
+    # its own sub-volume instead of a full-volume comparison
+    slices = ndimage.find_objects(atlas_data)
+    # Every ROI has the same uint8 header: encode it once (with the slope and
+    # intercept nibabel's writer would set) instead of building an image per ROI
+    header = atlas_img.header.copy()
+    header.set_data_dtype(np.uint8)
+    template = nib.Nifti1Image(np.broadcast_to(np.uint8(0), atlas_data.shape), atlas_img.affine, header)
+    template.update_header()
+    template.header.set_slope_inter(1, 0)
+    header_io = io.BytesIO()
+    template.header.write_to(header_io)
+    header_bytes = header_io.getvalue().ljust(int(template.header.get_data_offset()), b'\0')
+    
+    # gzip compression is CPU-bound and independent per file
+    with ProcessPoolExecutor() as executor:
+        futures = []
+        for label, sl in enumerate(slices, 1):
+            if sl is None:
+                continue
+            sub_mask = (atlas_data[sl] == label).astype(np.uint8)
+            filename = f"levtiades_roi_{label:03d}{suffix}"
+            futures.append(executor.submit(_save_roi, sub_mask, sl, atlas_data.shape,
+                                           header_bytes, roi_dir / filename))
+        roi_paths = [future.result() for future in futures]
+    
+    if pigz:
+        subprocess.run([pigz, "-f", "-p", str(os.cpu_count() or 1), *map(str, roi_paths)], check=True)
+    
+    print(f"✅ Created {len(futures)} ROI files in individual_rois/")
+
+def parse_args():
+    p = argparse.ArgumentParser(description="Create CORRECT hemisphere-ordered Levtiades Atlas")
+    p.add_argument("--write-rois", action="store_true",
+                   help="Also write one NIfTI file per region to levtiades_atlas/individual_rois/")
+    return p.parse_args()
 
 if __name__ == "__main__":
+    args = parse_args()
+    
+    # Load the atlas once; every step below works on the in-memory copy
+    atlas_img, atlas_data = load_atlas(ATLAS_PATH)
+    
     # Step 1: Create corrected hemisphere atlas
-    atlas_data, atlas_img, hemisphere_map = create_correct_hemisphere_atlas()
+    atlas_data, atlas_img, hemisphere_map = create_correct_hemisphere_atlas(atlas_img, atlas_data)
     
     if atlas_data is None:
         print("❌ Failed to create corrected atlas!")
         exit(1)
     
     # Step 2: Validate corrected atlas
-    validation_df = validate_corrected_atlas(hemisphere_map)
+    validation_df = validate_corrected_atlas(atlas_img, atlas_data, hemisphere_map)
     
     # Step 3: Update all files
-    update_corrected_files(hemisphere_map)
+    update_corrected_files(atlas_img, atlas_data, hemisphere_map)
     
-    # Step 4: Create individual ROIs
-    create_individual_rois()
+    # Step 4: Create individual ROIs (optional; the atlas itself is already saved
+    # and is what later steps read)
+    if args.write_rois:
+        create_individual_rois(atlas_img, atlas_data)
     
     print("\n✅ CORRECTED LEVTIADES ATLAS COMPLETE!")
     print("=" * 40)
     print("📊 Hemisphere ordering: Levinson → Tian-LEFT → Tian-RIGHT → Destrieux-LEFT → Destrieux-RIGHT")
     print("📋 All files updated with corrected hemisphere assignment")
-    print("🎯 Individual ROI files created in individual_rois/")
\ No newline at end of file
+    if args.write_rois:
+        print("🎯 Individual ROI files created in individual_rois/")
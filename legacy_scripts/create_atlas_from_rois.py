@@ -6,6 +6,16 @@ Create atlas file from individual ROI files
 import nibabel as nib
 import numpy as np
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+def load_roi_voxels(roi_file):
+    """Return (roi number, flat indices of the ROI's voxels) for one ROI file"""
+    # Extract ROI number from filename
+    roi_num = int(roi_file.name.split('_')[-1].split('.')[0])
+    
+    # Read in the on-disk dtype; get_fdata would upcast the mask to float64
+    roi_data = np.asarray(nib.load(roi_file).dataobj)
+    return roi_num, np.flatnonzero(roi_data > 0)
 
 def create_atlas_from_rois():
     """Create single atlas file from individual ROI files"""
@@ -27,29 +37,35 @@ def create_atlas_from_rois():
     affine = first_roi.affine
     header = first_roi.header
     
-    # Create empty atlas
-    atlas_data = np.zeros(atlas_shape, dtype=np.int16)
-    
-    # Load each ROI and add to atlas
-    for roi_file in roi_files:
-        # Extract ROI number from filename
-        roi_num = int(roi_file.name.split('_')[-1].split('.')[0])
-        
-        # Load ROI
-        roi_img = nib.load(roi_file)
-        roi_data = roi_img.get_fdata()
-        
-        # Add to atlas (ROI data should be binary 0/1)
-        mask = roi_data > 0
-        atlas_data[mask] = roi_num
-        
-        if roi_num % 50 == 0:
-            print(f"   Processed ROI {roi_num}")
+    # Create empty atlas (labels are at most 255, so uint8 is enough)
+    atlas_data = np.zeros(atlas_shape, dtype=np.uint8)
+    
+    # Load ROIs on a thread pool (gzip decoding releases the GIL); map keeps
+    # file order
+    roi_nums, roi_voxels = [], []
+    with ThreadPoolExecutor() as executor:
+        for roi_num, voxels in executor.map(load_roi_voxels, roi_files):
+            roi_nums.append(roi_num)
+            roi_voxels.append(voxels)
+            
+            if roi_num % 50 == 0:
+                print(f"   Processed ROI {roi_num}")
+    
+    # Add all ROIs to the atlas in one scatter (ROI data should be binary 0/1).
+    # Where ROIs overlap, only each voxel's last occurrence is kept, so later
+    # ROIs still overwrite earlier ones
+    assert max(roi_nums) < 256, "uint8 atlas cannot hold more than 255 labels"
+    voxels = np.concatenate(roi_voxels)
+    labels = np.repeat(roi_nums, [v.size for v in roi_voxels])
+    last = voxels.size - 1 - np.unique(voxels[::-1], return_index=True)[1]
+    atlas_data.reshape(-1)[voxels[last]] = labels[last]
     
     # Save atlas
     output_dir = Path("levtiades_atlas/final_atlas/no_overlaps")
     output_dir.mkdir(parents=True, exist_ok=True)
     
+    header = header.copy()
+    header.set_data_dtype(np.uint8)
     atlas_img = nib.Nifti1Image(atlas_data, affine, header)
     output_path = output_dir / "levtiades_sequential.nii.gz"
     nib.save(atlas_img, output_path)
@@ -8,84 +8,183 @@ import numpy as np
 from pathlib import Path
 import pandas as pd
 from scipy import ndimage
+import gzip
+import os
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
-def create_spaced_atlas():
+def _gzip_file(raw_path, gz_path):
+    """Compress raw_path to gz_path and remove raw_path"""
+    pigz = shutil.which("pigz")
+    if pigz:
+        # pigz writes raw_path + ".gz", which is gz_path
+        subprocess.run([pigz, "-f", "-p", str(os.cpu_count() or 1), str(raw_path)], check=True)
+    else:
+        with open(raw_path, 'rb') as src, gzip.GzipFile(gz_path, 'wb', compresslevel=1, mtime=0) as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+        raw_path.unlink()
+
+def save_nii(img, path, compress=_gzip_file):
+    """Save img to path, writing .nii.gz outputs uncompressed and then gzipping
+    
+    compress(raw_path, gz_path) does the gzip step (with multi-threaded pigz
+    when installed); main passes one that queues it on a worker thread so the
+    script carries on meanwhile.
+    """
+    path = Path(path)
+    if path.suffix != ".gz":
+        nib.save(img, path)
+        return path
+    
+    raw_path = path.with_suffix("")
+    nib.save(img, raw_path)
+    compress(raw_path, path)
+    return path
+
+def load_atlas(path):
+    """Load a label image, returning (img, data) with data in its stored dtype
+    
+    get_fdata() would upcast the labels to float64 only for them to be cast
+    back to int; the on-disk integer array is read directly instead. NIfTI
+    data comes back in Fortran order, so it is made C-contiguous once here and
+    the .ravel() calls feeding bincount below are views, not copies.
+    """
+    img = nib.load(path)
+    data = np.ascontiguousarray(np.asanyarray(img.dataobj))
+    if not np.issubdtype(data.dtype, np.integer):
+        data = data.astype(int)
+    return img, data
+
+def load_tian_labels(path):
+    """Tian region names keyed by line number (original Tian index)"""
+    path = Path(path)
+    if not path.exists():
+        return {}
+    lines = (line.strip() for line in path.read_text().splitlines())
+    return {i: label for i, label in enumerate(lines, 1) if label}
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+if numba is not None:
+    @numba.njit(parallel=True, cache=True)
+    def _joint_hist_kernel(a, b, n_a, n_b, n_chunks):
+        # One histogram per chunk, summed at the end, so threads never
+        # increment the same bin
+        hist = np.zeros((n_chunks, n_a, n_b), dtype=np.int64)
+        step = (a.size + n_chunks - 1) // n_chunks
+        for c in numba.prange(n_chunks):
+            for i in range(c * step, min((c + 1) * step, a.size)):
+                if a[i] > 0 and b[i] > 0:
+                    hist[c, a[i], b[i]] += 1
+        return hist.sum(axis=0)
+
+def joint_label_counts(a, b):
+    """Voxel counts of every overlapping (a label, b label) pair in one pass
+    
+    Returns (a labels, b labels, counts) for all pairs of nonzero labels that
+    share at least one voxel, ordered by a label and then b label. Uses a
+    parallel numba kernel when numba is installed.
+    """
+    a, b = a.ravel(), b.ravel()
+    if numba is not None and a.size:
+        n_a, n_b = max(int(a.max()), 0) + 1, max(int(b.max()), 0) + 1
+        hist = _joint_hist_kernel(a, b, n_a, n_b, numba.get_num_threads())
+        a_labels, b_labels = np.nonzero(hist)
+        return a_labels, b_labels, hist[a_labels, b_labels]
+    
+    both = (a > 0) & (b > 0)
+    a, b = a[both].astype(np.int64), b[both].astype(np.int64)
+    n_b = int(b.max()) + 1 if b.size else 1
+    # Joint histogram: bin a * n_b + b counts the voxels labelled a in one
+    # atlas and b in the other
+    hist = np.bincount(a * n_b + b)
+    pairs = np.flatnonzero(hist)
+    return pairs // n_b, pairs % n_b, hist[pairs]
+
+def overlap_table(overlap_type, atlas1, atlas2, idx1, idx2, overlap_voxels,
+                  names1, names2, totals1, totals2):
+    """Overlap rows for one atlas pair, built column-wise from joint_label_counts output"""
+    return pd.DataFrame({
+        'overlap_type': overlap_type,
+        'region1_atlas': atlas1,
+        'region1_index': idx1,
+        'region1_name': names1,
+        'region1_total_voxels': totals1[idx1],
+        'region2_atlas': atlas2,
+        'region2_index': idx2,
+        'region2_name': names2,
+        'region2_total_voxels': totals2[idx2],
+        'overlap_voxels': overlap_voxels,
+        'overlap_percent_region1': np.round((overlap_voxels / totals1[idx1]) * 100, 2),
+        'overlap_percent_region2': np.round((overlap_voxels / totals2[idx2]) * 100, 2)
+    })
+
+def create_spaced_atlas(atlas_img, atlas_data, compress=_gzip_file):
     """Create atlas with spaced indices (300, 350, 400...) for MRIcroGL visualization"""
     
     print("🎨 CREATING SPACED ATLAS FOR MRIcroGL")
     print("=" * 40)
     
-    # Load sequential atlas
-    atlas_path = Path("levtiades_atlas/final_atlas/no_overlaps/levtiades_sequential.nii.gz")
-    atlas_img = nib.load(atlas_path)
-    atlas_data = atlas_img.get_fdata().astype(int)
-    
-    # Create spaced version
-    spaced_data = np.zeros_like(atlas_data, dtype=np.int16)
-    
-    unique_labels = sorted(np.unique(atlas_data[atlas_data > 0]))
+    # Labels present, from one bincount pass instead of a mask plus sort
+    unique_labels = np.flatnonzero(np.bincount(atlas_data.ravel()))
+    unique_labels = unique_labels[unique_labels > 0]
     print(f"   Converting {len(unique_labels)} regions to spaced indices...")
     
+    # Create spaced version with a single gather through a lookup table
+    # instead of one masked pass over the volume per label
+    lut = np.zeros(int(atlas_data.max()) + 1, dtype=np.int16)
+    lut[unique_labels] = 300 + (unique_labels - 1) * 50  # 300, 350, 400, 450...
+    spaced_data = lut[atlas_data]
+    
     for sequential_idx in unique_labels:
-        spaced_idx = 300 + (sequential_idx - 1) * 50  # 300, 350, 400, 450...
-        mask = atlas_data == sequential_idx
-        spaced_data[mask] = spaced_idx
-        
         if sequential_idx <= 10 or sequential_idx % 50 == 0:
-            print(f"     Region {sequential_idx} -> {spaced_idx}")
+            print(f"     Region {sequential_idx} -> {lut[sequential_idx]}")
     
-    # Save spaced atlas
-    spaced_img = nib.Nifti1Image(spaced_data, atlas_img.affine, atlas_img.header)
+    # Save spaced atlas (the sequential header is uint8, too small for 300+)
+    spaced_header = atlas_img.header.copy()
+    spaced_header.set_data_dtype(np.int16)
+    spaced_img = nib.Nifti1Image(spaced_data, atlas_img.affine, spaced_header)
     spaced_path = Path("levtiades_atlas/final_atlas/no_overlaps/levtiades_spaced_mricrogl.nii.gz")
-    nib.save(spaced_img, spaced_path)
+    save_nii(spaced_img, spaced_path, compress)
     
     print(f"✅ Spaced atlas created: {spaced_path}")
     print(f"   Index range: 300 - {300 + (len(unique_labels)-1) * 50}")
     
     return spaced_path
 
-def create_with_overlaps_atlas():
+def create_with_overlaps_atlas(lev_img, lev_data, tian_data, des_data, compress=_gzip_file):
     """Create atlas showing overlapping regions and analyze overlaps"""
     
     print("\n🔍 CREATING WITH_OVERLAPS ATLAS")
     print("=" * 35)
     
-    # Load aligned individual atlases
-    aligned_dir = Path("levtiades_atlas/aligned_atlases")
-    
-    lev_img = nib.load(aligned_dir / "levinson_aligned.nii.gz")
-    tian_img = nib.load(aligned_dir / "tian_aligned.nii.gz")
-    des_img = nib.load(aligned_dir / "destrieux_aligned.nii.gz")
-    
-    lev_data = lev_img.get_fdata().astype(int)
-    tian_data = tian_img.get_fdata().astype(int)
-    des_data = des_img.get_fdata().astype(int)
-    
     print("   Analyzing overlaps between atlases...")
     
-    # Create masks for each atlas
-    lev_mask = lev_data > 0
-    tian_mask = tian_data > 0
-    des_mask = des_data > 0
-    
-    # Find overlap regions
-    lev_tian_overlap = lev_mask & tian_mask
-    lev_des_overlap = lev_mask & des_mask
-    tian_des_overlap = tian_mask & des_mask
-    all_three_overlap = lev_mask & tian_mask & des_mask
+    # Encode which atlases cover each voxel as bits (1 = Levinson, 2 = Tian,
+    # 4 = Destrieux); one bincount of the codes then gives every overlap count.
+    # The Tian and Destrieux bits go through one reused scratch buffer
+    code = (lev_data > 0).view(np.uint8)
+    bit = np.empty_like(code)
+    for shift, data in ((1, tian_data), (2, des_data)):
+        np.greater(data, 0, out=bit.view(bool))
+        np.left_shift(bit, shift, out=bit)
+        np.bitwise_or(code, bit, out=code)
+    code_counts = np.bincount(code.ravel(), minlength=8)
     
     # Calculate overlap statistics
-    total_brain_voxels = np.sum(lev_mask | tian_mask | des_mask)
-    
     overlap_stats = {
-        'levinson_voxels': np.sum(lev_mask),
-        'tian_voxels': np.sum(tian_mask),
-        'destrieux_voxels': np.sum(des_mask),
-        'total_brain_voxels': total_brain_voxels,
-        'lev_tian_overlap': np.sum(lev_tian_overlap),
-        'lev_des_overlap': np.sum(lev_des_overlap),
-        'tian_des_overlap': np.sum(tian_des_overlap),
-        'all_three_overlap': np.sum(all_three_overlap)
+        'levinson_voxels': code_counts[[1, 3, 5, 7]].sum(),
+        'tian_voxels': code_counts[[2, 3, 6, 7]].sum(),
+        'destrieux_voxels': code_counts[[4, 5, 6, 7]].sum(),
+        'total_brain_voxels': code_counts[1:].sum(),
+        'lev_tian_overlap': code_counts[[3, 7]].sum(),
+        'lev_des_overlap': code_counts[[5, 7]].sum(),
+        'tian_des_overlap': code_counts[[6, 7]].sum(),
+        'all_three_overlap': code_counts[7]
     }
     
     print(f"   Levinson voxels: {overlap_stats['levinson_voxels']:,}")
@@ -100,49 +199,33 @@ def create_with_overlaps_atlas():
     # Create combined with_overlaps atlas using multichannel approach
     print("   Creating multichannel with_overlaps atlas...")
     
-    # Create 4D multichannel image (each atlas as separate channel)
-    multichannel_data = np.zeros((*lev_data.shape, 4), dtype=np.int16)
-    
-    # Channel 0: Levinson (indices 1-5)
-    multichannel_data[:, :, :, 0] = lev_data
+    # Channel 3: Overlap map (1 = Lev-Tian, 2 = Lev-Des, 3 = Tian-Des,
+    # 4 = All-three overlaps)
+    overlap_lut = np.array([0, 0, 0, 1, 0, 2, 3, 4], dtype=np.int16)
+    overlap_map = overlap_lut[code]
     
-    # Channel 1: Tian (indices 1-54) 
-    multichannel_data[:, :, :, 1] = tian_data
-    
-    # Channel 2: Destrieux (indices 1-148+)
-    multichannel_data[:, :, :, 2] = des_data
-    
-    # Channel 3: Overlap map
-    overlap_map = np.zeros_like(lev_data, dtype=np.int16)
-    overlap_map[lev_tian_overlap] = 1  # Lev-Tian overlaps
-    overlap_map[lev_des_overlap] = 2   # Lev-Des overlaps  
-    overlap_map[tian_des_overlap] = 3  # Tian-Des overlaps
-    overlap_map[all_three_overlap] = 4 # All-three overlaps
-    multichannel_data[:, :, :, 3] = overlap_map
+    # Create 4D multichannel image (each atlas as separate channel), filled
+    # in one allocation without a zero-initialisation pass
+    multichannel_data = np.stack([
+        lev_data,     # Channel 0: Levinson (indices 1-5)
+        tian_data,    # Channel 1: Tian (indices 1-54)
+        des_data,     # Channel 2: Destrieux (indices 1-148+)
+        overlap_map,  # Channel 3: Overlap map
+    ], axis=-1).astype(np.int16, copy=False)
     
     # Create flat version showing priority resolution
     print("   Creating flat with_overlaps atlas (hierarchy: Levinson > Tian > Destrieux)...")
     
-    flat_data = np.zeros_like(lev_data, dtype=np.int16)
-    
-    # Apply hierarchical priority: Levinson > Tian > Destrieux
+    # Apply hierarchical priority: Levinson > Tian > Destrieux, one
+    # vectorized layer per atlas instead of a masked store per label (the
+    # offsets are np.int16 so uint8 labels are promoted instead of overflowing)
     # Start with Destrieux (lowest priority)
-    unique_des = sorted(np.unique(des_data[des_data > 0]))
-    for des_idx in unique_des:
-        mask = des_data == des_idx
-        flat_data[mask] = 2000 + des_idx  # Destrieux: 2001-2148+
-    
+    flat_data = np.where(des_data > 0, des_data + np.int16(2000), 0)            # Destrieux: 2001-2148+
     # Add Tian (medium priority) - overwrites Destrieux where they overlap
-    unique_tian = sorted(np.unique(tian_data[tian_data > 0]))
-    for tian_idx in unique_tian:
-        mask = tian_data == tian_idx
-        flat_data[mask] = 1000 + tian_idx  # Tian: 1001-1054
-    
+    flat_data = np.where(tian_data > 0, tian_data + np.int16(1000), flat_data)  # Tian: 1001-1054
     # Add Levinson (highest priority) - overwrites everything
-    unique_lev = sorted(np.unique(lev_data[lev_data > 0]))
-    for lev_idx in unique_lev:
-        mask = lev_data == lev_idx
-        flat_data[mask] = lev_idx  # Levinson: 1-5
+    flat_data = np.where(lev_data > 0, lev_data, flat_data)                     # Levinson: 1-5
+    flat_data = flat_data.astype(np.int16)
     
     # Save atlases
     with_overlaps_dir = Path("levtiades_atlas/final_atlas/with_overlaps")
@@ -151,169 +234,95 @@ def create_with_overlaps_atlas():
     # Save multichannel version
     multichannel_img = nib.Nifti1Image(multichannel_data, lev_img.affine, lev_img.header)
     multichannel_path = with_overlaps_dir / "levtiades_multichannel.nii.gz"
-    nib.save(multichannel_img, multichannel_path)
+    save_nii(multichannel_img, multichannel_path, compress)
     
     # Save flat version
     flat_img = nib.Nifti1Image(flat_data, lev_img.affine, lev_img.header)
     flat_path = with_overlaps_dir / "levtiades_flat_with_overlaps.nii.gz"
-    nib.save(flat_img, flat_path)
+    save_nii(flat_img, flat_path, compress)
     
     print(f"✅ Multichannel atlas: {multichannel_path}")
     print(f"✅ Flat with overlaps: {flat_path}")
     
     return overlap_stats, with_overlaps_dir
 
-def analyze_region_overlaps(overlap_stats, output_dir):
+def analyze_region_overlaps(overlap_stats, output_dir, lev_data, tian_data, des_data, tian_labels):
     """Analyze which specific regions overlap with each other"""
     
     print("\n🔬 ANALYZING SPECIFIC REGION OVERLAPS")
     print("=" * 40)
     
-    # Load aligned atlases
-    aligned_dir = Path("levtiades_atlas/aligned_atlases")
-    
-    lev_img = nib.load(aligned_dir / "levinson_aligned.nii.gz")
-    tian_img = nib.load(aligned_dir / "tian_aligned.nii.gz") 
-    des_img = nib.load(aligned_dir / "destrieux_aligned.nii.gz")
-    
-    lev_data = lev_img.get_fdata().astype(int)
-    tian_data = tian_img.get_fdata().astype(int)
-    des_data = des_img.get_fdata().astype(int)
-    
     # Load mapping data for region names
     mapping_df = pd.read_csv("levtiades_atlas/index_mapping_reference.csv")
     
-    # Load Tian labels
-    tian_labels = {}
-    tian_file = Path("data/Tian2020MSA_v1.4/3T/Subcortex-Only/Tian_Subcortex_S4_3T_label.txt")
-    if tian_file.exists():
-        with open(tian_file, 'r') as f:
-            for i, line in enumerate(f, 1):
-                label = line.strip()
-                if label:
-                    tian_labels[i] = label
+    # Region names by original index (the first mapping row wins, as with
+    # .iloc[0]); Destrieux names are unwrapped from their tuple text once
+    first_rows = mapping_df.drop_duplicates('old_index')
+    region_names = dict(zip(first_rows['old_index'], first_rows['region_name']))
+    des_names = {
+        index: name.split("'")[1] if isinstance(name, str) and "')," in name else name
+        for index, name in region_names.items()
+    }
+    
+    # Only counts are needed, so keep just the voxels labelled in any atlas
+    # as flat arrays; every pass below then skips the background
+    brain = (lev_data > 0) | (tian_data > 0) | (des_data > 0)
+    lev_data, tian_data, des_data = lev_data[brain], tian_data[brain], des_data[brain]
     
-    overlap_details = []
+    # Region sizes, indexed by label
+    lev_totals = np.bincount(lev_data[lev_data > 0])
+    tian_totals = np.bincount(tian_data[tian_data > 0])
+    des_totals = np.bincount(des_data[des_data > 0])
+    
+    # Joint histograms of the three atlas pairs
+    lev_tian_counts = joint_label_counts(lev_data, tian_data)
+    lev_des_counts = joint_label_counts(lev_data, des_data)
+    tian_des_counts = joint_label_counts(tian_data, des_data)
     
     # Analyze Levinson-Tian overlaps
     print("   Analyzing Levinson-Tian overlaps...")
-    for lev_idx in sorted(np.unique(lev_data[lev_data > 0])):
-        lev_mask = lev_data == lev_idx
-        lev_name = mapping_df[mapping_df['old_index'] == lev_idx]['region_name'].iloc[0] if len(mapping_df[mapping_df['old_index'] == lev_idx]) > 0 else f"Levinson_{lev_idx}"
-        
-        for tian_idx in sorted(np.unique(tian_data[tian_data > 0])):
-            tian_mask = tian_data == tian_idx
-            overlap_mask = lev_mask & tian_mask
-            overlap_voxels = np.sum(overlap_mask)
-            
-            if overlap_voxels > 0:
-                tian_name = tian_labels.get(tian_idx, f"Tian_{tian_idx}")
-                lev_total = np.sum(lev_mask)
-                tian_total = np.sum(tian_mask)
-                
-                overlap_details.append({
-                    'overlap_type': 'Levinson-Tian',
-                    'region1_atlas': 'Levinson',
-                    'region1_index': lev_idx,
-                    'region1_name': lev_name,
-                    'region1_total_voxels': lev_total,
-                    'region2_atlas': 'Tian',
-                    'region2_index': tian_idx,
-                    'region2_name': tian_name,
-                    'region2_total_voxels': tian_total,
-                    'overlap_voxels': overlap_voxels,
-                    'overlap_percent_region1': round((overlap_voxels / lev_total) * 100, 2),
-                    'overlap_percent_region2': round((overlap_voxels / tian_total) * 100, 2)
-                })
-                print(f"     {lev_name} ↔ {tian_name}: {overlap_voxels} voxels")
+    lev_idx, tian_idx, overlap_voxels = lev_tian_counts
+    lev_tian = overlap_table(
+        'Levinson-Tian', 'Levinson', 'Tian', lev_idx, tian_idx, overlap_voxels,
+        [region_names.get(i, f"Levinson_{i}") for i in lev_idx],
+        [tian_labels.get(i, f"Tian_{i}") for i in tian_idx],
+        lev_totals, tian_totals)
+    for name1, name2, voxels in zip(lev_tian['region1_name'], lev_tian['region2_name'], lev_tian['overlap_voxels']):
+        print(f"     {name1} ↔ {name2}: {voxels} voxels")
     
     # Analyze Levinson-Destrieux overlaps
     print("   Analyzing Levinson-Destrieux overlaps...")
-    for lev_idx in sorted(np.unique(lev_data[lev_data > 0])):
-        lev_mask = lev_data == lev_idx
-        lev_name = mapping_df[mapping_df['old_index'] == lev_idx]['region_name'].iloc[0] if len(mapping_df[mapping_df['old_index'] == lev_idx]) > 0 else f"Levinson_{lev_idx}"
-        
-        for des_idx in sorted(np.unique(des_data[des_data > 0])):
-            des_mask = des_data == des_idx
-            overlap_mask = lev_mask & des_mask
-            overlap_voxels = np.sum(overlap_mask)
-            
-            if overlap_voxels > 0:
-                des_row = mapping_df[mapping_df['old_index'] == (200 + des_idx)]
-                des_name = des_row['region_name'].iloc[0] if len(des_row) > 0 else f"Destrieux_{des_idx}"
-                if isinstance(des_name, str) and "')," in des_name:
-                    des_name = des_name.split("'")[1]
-                    
-                lev_total = np.sum(lev_mask)
-                des_total = np.sum(des_mask)
-                
-                overlap_details.append({
-                    'overlap_type': 'Levinson-Destrieux',
-                    'region1_atlas': 'Levinson',
-                    'region1_index': lev_idx,
-                    'region1_name': lev_name,
-                    'region1_total_voxels': lev_total,
-                    'region2_atlas': 'Destrieux',
-                    'region2_index': des_idx,
-                    'region2_name': des_name,
-                    'region2_total_voxels': des_total,
-                    'overlap_voxels': overlap_voxels,
-                    'overlap_percent_region1': round((overlap_voxels / lev_total) * 100, 2),
-                    'overlap_percent_region2': round((overlap_voxels / des_total) * 100, 2)
-                })
-                print(f"     {lev_name} ↔ {des_name}: {overlap_voxels} voxels")
+    lev_idx, des_idx, overlap_voxels = lev_des_counts
+    lev_des = overlap_table(
+        'Levinson-Destrieux', 'Levinson', 'Destrieux', lev_idx, des_idx, overlap_voxels,
+        [region_names.get(i, f"Levinson_{i}") for i in lev_idx],
+        [des_names.get(200 + i, f"Destrieux_{i}") for i in des_idx],
+        lev_totals, des_totals)
+    for name1, name2, voxels in zip(lev_des['region1_name'], lev_des['region2_name'], lev_des['overlap_voxels']):
+        print(f"     {name1} ↔ {name2}: {voxels} voxels")
     
     # Analyze Tian-Destrieux overlaps (top 20 only due to volume)
     print("   Analyzing Tian-Destrieux overlaps (showing top 20)...")
-    tian_des_overlaps = []
-    
-    for tian_idx in sorted(np.unique(tian_data[tian_data > 0])):
-        tian_mask = tian_data == tian_idx
-        tian_name = tian_labels.get(tian_idx, f"Tian_{tian_idx}")
-        
-        for des_idx in sorted(np.unique(des_data[des_data > 0])):
-            des_mask = des_data == des_idx
-            overlap_mask = tian_mask & des_mask
-            overlap_voxels = np.sum(overlap_mask)
-            
-            if overlap_voxels > 0:
-                des_row = mapping_df[mapping_df['old_index'] == (200 + des_idx)]
-                des_name = des_row['region_name'].iloc[0] if len(des_row) > 0 else f"Destrieux_{des_idx}"
-                if isinstance(des_name, str) and "')," in des_name:
-                    des_name = des_name.split("'")[1]
-                
-                tian_total = np.sum(tian_mask)
-                des_total = np.sum(des_mask)
-                
-                tian_des_overlaps.append({
-                    'overlap_type': 'Tian-Destrieux',
-                    'region1_atlas': 'Tian',
-                    'region1_index': tian_idx,
-                    'region1_name': tian_name,
-                    'region1_total_voxels': tian_total,
-                    'region2_atlas': 'Destrieux',
-                    'region2_index': des_idx,
-                    'region2_name': des_name,
-                    'region2_total_voxels': des_total,
-                    'overlap_voxels': overlap_voxels,
-                    'overlap_percent_region1': round((overlap_voxels / tian_total) * 100, 2),
-                    'overlap_percent_region2': round((overlap_voxels / des_total) * 100, 2)
-                })
-    
-    # Sort by overlap size and take top 20
-    tian_des_overlaps.sort(key=lambda x: x['overlap_voxels'], reverse=True)
-    for overlap in tian_des_overlaps[:20]:
-        print(f"     {overlap['region1_name']} ↔ {overlap['region2_name']}: {overlap['overlap_voxels']} voxels")
-        overlap_details.append(overlap)
+    tian_idx, des_idx, overlap_voxels = tian_des_counts
+    # Sort by overlap size and take top 20 (stable, so ties keep index order);
+    # only those 20 rows need names
+    top = np.argsort(-overlap_voxels, kind='stable')[:20]
+    tian_des = overlap_table(
+        'Tian-Destrieux', 'Tian', 'Destrieux', tian_idx[top], des_idx[top], overlap_voxels[top],
+        [tian_labels.get(i, f"Tian_{i}") for i in tian_idx[top]],
+        [des_names.get(200 + i, f"Destrieux_{i}") for i in des_idx[top]],
+        tian_totals, des_totals)
+    for name1, name2, voxels in zip(tian_des['region1_name'], tian_des['region2_name'], tian_des['overlap_voxels']):
+        print(f"     {name1} ↔ {name2}: {voxels} voxels")
     
     # Save detailed overlap analysis
-    if overlap_details:
-        overlap_df = pd.DataFrame(overlap_details)
+    overlap_df = pd.concat([lev_tian, lev_des, tian_des], ignore_index=True)
+    if len(overlap_df):
         overlap_csv = output_dir / "region_overlap_analysis.csv"
         overlap_df.to_csv(overlap_csv, index=False)
         print(f"✅ Detailed overlap analysis: {overlap_csv}")
     
-    return overlap_details
+    return overlap_df.to_dict('records')
 
 def create_overlap_report(overlap_stats, overlap_details, output_dir):
     """Create comprehensive overlap analysis report"""
@@ -323,96 +332,122 @@ def create_overlap_report(overlap_stats, overlap_details, output_dir):
     
     report_path = output_dir / "overlap_analysis_report.txt"
     
-    with open(report_path, 'w') as f:
-        f.write("LEVTIADES ATLAS OVERLAP ANALYSIS REPORT\n")
-        f.write("=" * 40 + "\n\n")
-        f.write(f"Generated: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write("Atlas files analyzed:\n")
-        f.write("- levtiades_atlas/aligned_atlases/levinson_aligned.nii.gz\n")
-        f.write("- levtiades_atlas/aligned_atlases/tian_aligned.nii.gz\n")
-        f.write("- levtiades_atlas/aligned_atlases/destrieux_aligned.nii.gz\n\n")
-        
-        # Overall statistics
-        f.write("OVERALL OVERLAP STATISTICS\n")
-        f.write("-" * 26 + "\n")
-        f.write(f"Total brain coverage: {overlap_stats['total_brain_voxels']:,} voxels\n")
-        f.write(f"Levinson coverage: {overlap_stats['levinson_voxels']:,} voxels ({overlap_stats['levinson_voxels']/overlap_stats['total_brain_voxels']*100:.1f}%)\n")
-        f.write(f"Tian coverage: {overlap_stats['tian_voxels']:,} voxels ({overlap_stats['tian_voxels']/overlap_stats['total_brain_voxels']*100:.1f}%)\n")
-        f.write(f"Destrieux coverage: {overlap_stats['destrieux_voxels']:,} voxels ({overlap_stats['destrieux_voxels']/overlap_stats['total_brain_voxels']*100:.1f}%)\n\n")
-        
-        f.write("OVERLAP SUMMARY\n")
-        f.write("-" * 15 + "\n")
-        f.write(f"Levinson-Tian overlaps: {overlap_stats['lev_tian_overlap']:,} voxels\n")
-        f.write(f"Levinson-Destrieux overlaps: {overlap_stats['lev_des_overlap']:,} voxels\n")
-        f.write(f"Tian-Destrieux overlaps: {overlap_stats['tian_des_overlap']:,} voxels\n")
-        f.write(f"Three-way overlaps: {overlap_stats['all_three_overlap']:,} voxels\n\n")
-        
-        # Overlap percentages
-        total_overlap = overlap_stats['lev_tian_overlap'] + overlap_stats['lev_des_overlap'] + overlap_stats['tian_des_overlap']
-        f.write(f"Total overlapping voxels: {total_overlap:,} ({total_overlap/overlap_stats['total_brain_voxels']*100:.1f}% of brain)\n\n")
-        
-        # Resolution hierarchy explanation
-        f.write("OVERLAP RESOLUTION HIERARCHY\n")
-        f.write("-" * 28 + "\n")
-        f.write("When regions from multiple atlases occupy the same voxel,\n")
-        f.write("the final atlas uses this priority hierarchy:\n")
-        f.write("1. LEVINSON (brainstem) - HIGHEST priority\n")
-        f.write("2. TIAN (subcortical) - MEDIUM priority\n")
-        f.write("3. DESTRIEUX (cortical) - LOWEST priority\n\n")
-        f.write("This ensures anatomically critical brainstem and subcortical\n")
-        f.write("structures are preserved over cortical regions when overlaps occur.\n\n")
-        
-        # Specific region overlaps
-        if overlap_details:
-            f.write("SPECIFIC REGION OVERLAPS\n")
-            f.write("-" * 23 + "\n")
-            
-            # Group by overlap type
-            by_type = {}
-            for detail in overlap_details:
-                overlap_type = detail['overlap_type']
-                if overlap_type not in by_type:
-                    by_type[overlap_type] = []
-                by_type[overlap_type].append(detail)
-            
-            for overlap_type, details in by_type.items():
-                f.write(f"\n{overlap_type.upper()}:\n")
-                for detail in details:
-                    f.write(f"  {detail['region1_name']} ↔ {detail['region2_name']}\n")
-                    f.write(f"    Overlap: {detail['overlap_voxels']} voxels\n")
-                    f.write(f"    % of {detail['region1_atlas']}: {detail['overlap_percent_region1']}%\n")
-                    f.write(f"    % of {detail['region2_atlas']}: {detail['overlap_percent_region2']}%\n\n")
+    # Collect the report text and write it in one call
+    parts = []
+    w = parts.append
+    
+    w("LEVTIADES ATLAS OVERLAP ANALYSIS REPORT\n")
+    w("=" * 40 + "\n\n")
+    w(f"Generated: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+    w("Atlas files analyzed:\n")
+    w("- levtiades_atlas/aligned_atlases/levinson_aligned.nii.gz\n")
+    w("- levtiades_atlas/aligned_atlases/tian_aligned.nii.gz\n")
+    w("- levtiades_atlas/aligned_atlases/destrieux_aligned.nii.gz\n\n")
+    
+    # Overall statistics
+    w("OVERALL OVERLAP STATISTICS\n")
+    w("-" * 26 + "\n")
+    w(f"Total brain coverage: {overlap_stats['total_brain_voxels']:,} voxels\n")
+    w(f"Levinson coverage: {overlap_stats['levinson_voxels']:,} voxels ({overlap_stats['levinson_voxels']/overlap_stats['total_brain_voxels']*100:.1f}%)\n")
+    w(f"Tian coverage: {overlap_stats['tian_voxels']:,} voxels ({overlap_stats['tian_voxels']/overlap_stats['total_brain_voxels']*100:.1f}%)\n")
+    w(f"Destrieux coverage: {overlap_stats['destrieux_voxels']:,} voxels ({overlap_stats['destrieux_voxels']/overlap_stats['total_brain_voxels']*100:.1f}%)\n\n")
+    
+    w("OVERLAP SUMMARY\n")
+    w("-" * 15 + "\n")
+    w(f"Levinson-Tian overlaps: {overlap_stats['lev_tian_overlap']:,} voxels\n")
+    w(f"Levinson-Destrieux overlaps: {overlap_stats['lev_des_overlap']:,} voxels\n")
+    w(f"Tian-Destrieux overlaps: {overlap_stats['tian_des_overlap']:,} voxels\n")
+    w(f"Three-way overlaps: {overlap_stats['all_three_overlap']:,} voxels\n\n")
+    
+    # Overlap percentages
+    total_overlap = overlap_stats['lev_tian_overlap'] + overlap_stats['lev_des_overlap'] + overlap_stats['tian_des_overlap']
+    w(f"Total overlapping voxels: {total_overlap:,} ({total_overlap/overlap_stats['total_brain_voxels']*100:.1f}% of brain)\n\n")
+    
+    # Resolution hierarchy explanation
+    w("OVERLAP RESOLUTION HIERARCHY\n")
+    w("-" * 28 + "\n")
+    w("When regions from multiple atlases occupy the same voxel,\n")
+    w("the final atlas uses this priority hierarchy:\n")
+    w("1. LEVINSON (brainstem) - HIGHEST priority\n")
+    w("2. TIAN (subcortical) - MEDIUM priority\n")
+    w("3. DESTRIEUX (cortical) - LOWEST priority\n\n")
+    w("This ensures anatomically critical brainstem and subcortical\n")
+    w("structures are preserved over cortical regions when overlaps occur.\n\n")
+    
+    # Specific region overlaps
+    if overlap_details:
+        w("SPECIFIC REGION OVERLAPS\n")
+        w("-" * 23 + "\n")
         
-        f.write("FILES CREATED\n")
-        f.write("-" * 13 + "\n")
-        f.write("- levtiades_multichannel.nii.gz: 4D image with each atlas as separate channel\n")
-        f.write("- levtiades_flat_with_overlaps.nii.gz: 3D image with hierarchy-resolved overlaps\n")
-        f.write("- region_overlap_analysis.csv: Detailed overlap statistics\n")
-        f.write("- overlap_analysis_report.txt: This comprehensive report\n\n")
+        # Group by overlap type
+        by_type = {}
+        for detail in overlap_details:
+            overlap_type = detail['overlap_type']
+            if overlap_type not in by_type:
+                by_type[overlap_type] = []
+            by_type[overlap_type].append(detail)
         
-        f.write("INTERPRETATION\n")
-        f.write("-" * 14 + "\n")
-        f.write("Overlaps are expected when combining atlases from different sources\n")
-        f.write("as they may define boundaries differently or have different resolution.\n")
-        f.write("The hierarchical resolution ensures the most functionally important\n")
-        f.write("regions (brainstem) take precedence over less critical ones (cortical).\n")
+        for overlap_type, details in by_type.items():
+            w(f"\n{overlap_type.upper()}:\n")
+            for detail in details:
+                w(f"  {detail['region1_name']} ↔ {detail['region2_name']}\n")
+                w(f"    Overlap: {detail['overlap_voxels']} voxels\n")
+                w(f"    % of {detail['region1_atlas']}: {detail['overlap_percent_region1']}%\n")
+                w(f"    % of {detail['region2_atlas']}: {detail['overlap_percent_region2']}%\n\n")
+    
+    w("FILES CREATED\n")
+    w("-" * 13 + "\n")
+    w("- levtiades_multichannel.nii.gz: 4D image with each atlas as separate channel\n")
+    w("- levtiades_flat_with_overlaps.nii.gz: 3D image with hierarchy-resolved overlaps\n")
+    w("- region_overlap_analysis.csv: Detailed overlap statistics\n")
+    w("- overlap_analysis_report.txt: This comprehensive report\n\n")
+    
+    w("INTERPRETATION\n")
+    w("-" * 14 + "\n")
+    w("Overlaps are expected when combining atlases from different sources\n")
+    w("as they may define boundaries differently or have different resolution.\n")
+    w("The hierarchical resolution ensures the most functionally important\n")
+    w("regions (brainstem) take precedence over less critical ones (cortical).\n")
+    
+    with open(report_path, 'w') as f:
+        f.write("".join(parts))
     
     print(f"✅ Overlap report saved: {report_path}")
 
 def main():
     """Main function to create all atlas variants and analyses"""
     
-    # Step 1: Clean up and create spaced atlas
-    spaced_path = create_spaced_atlas()
-    
-    # Step 2: Create with_overlaps atlas and analyze
-    overlap_stats, output_dir = create_with_overlaps_atlas()
-    
-    # Step 3: Analyze specific region overlaps
-    overlap_details = analyze_region_overlaps(overlap_stats, output_dir)
-    
-    # Step 4: Create comprehensive report
-    create_overlap_report(overlap_stats, overlap_details, output_dir)
+    # Load every atlas once; the steps below share the in-memory arrays
+    atlas_img, atlas_data = load_atlas("levtiades_atlas/final_atlas/no_overlaps/levtiades_sequential.nii.gz")
+    aligned_dir = Path("levtiades_atlas/aligned_atlases")
+    lev_img, lev_data = load_atlas(aligned_dir / "levinson_aligned.nii.gz")
+    tian_img, tian_data = load_atlas(aligned_dir / "tian_aligned.nii.gz")
+    des_img, des_data = load_atlas(aligned_dir / "destrieux_aligned.nii.gz")
+    tian_labels = load_tian_labels("data/Tian2020MSA_v1.4/3T/Subcortex-Only/Tian_Subcortex_S4_3T_label.txt")
+    
+    # Atlas files are gzipped on worker threads while the later steps run;
+    # every job is waited on (and its errors raised) even if a step fails
+    with ThreadPoolExecutor(max_workers=2) as compression_pool:
+        pending = []
+        
+        def compress(raw_path, gz_path):
+            pending.append(compression_pool.submit(_gzip_file, raw_path, gz_path))
+        
+        try:
+            # Step 1: Clean up and create spaced atlas
+            spaced_path = create_spaced_atlas(atlas_img, atlas_data, compress)
+            
+            # Step 2: Create with_overlaps atlas and analyze
+            overlap_stats, output_dir = create_with_overlaps_atlas(lev_img, lev_data, tian_data, des_data, compress)
+            
+            # Step 3: Analyze specific region overlaps
+            overlap_details = analyze_region_overlaps(overlap_stats, output_dir, lev_data, tian_data, des_data, tian_labels)
+            
+            # Step 4: Create comprehensive report
+            create_overlap_report(overlap_stats, overlap_details, output_dir)
+        finally:
+            for future in pending:
+                future.result()
     
     print("\n✅ ALL ATLAS VARIANTS AND ANALYSES COMPLETE!")
     print("=" * 45)
@@ -5,145 +5,245 @@ Create detailed validation report with statistics and explanations
 
 import pandas as pd
 import numpy as np
+import pickle
+import sys
 from pathlib import Path
 from datetime import datetime
 
-def analyze_validation_results():
-    """Analyze validation results and create comprehensive reports"""
-    
-    print("📊 CREATING DETAILED VALIDATION REPORT")
-    print("=" * 40)
-    
-    # Load validation data
-    val_dir = Path("levtiades_atlas/centroid_validation")
-    val_csv = val_dir / "corrected_centroid_validation.csv"
-    
-    if not val_csv.exists():
-        print("❌ Validation CSV not found!")
-        return
+# Distance statistics in the column order of validation_statistics.csv
+DISTANCE_KEYS = ['mean_distance', 'std_distance', 'median_distance', 'min_distance',
+                 'max_distance', 'q25_distance', 'q75_distance']
+
+# Report blocks, each formatted with one format_map call
+EXECUTIVE_SUMMARY_TEMPLATE = (
+    "EXECUTIVE SUMMARY\n"
+    "-----------------\n"
+    "Total regions validated: {total_regions}\n"
+    "Perfect matches (< 1mm): {perfect_matches} ({match_percentage:.1f}%)\n"
+    "Acceptable mismatches (≥ 1mm): {mismatches} ({mismatch_percentage:.1f}%)\n"
+    "Overall validation quality: {quality}\n\n"
+)
+
+OVERALL_STATISTICS_TEMPLATE = (
+    "OVERALL STATISTICS\n"
+    "------------------\n"
+    "Mean distance: {mean_distance:.3f} mm\n"
+    "Standard deviation: {std_distance:.3f} mm\n"
+    "Median distance: {median_distance:.3f} mm\n"
+    "Minimum distance: {min_distance:.3f} mm\n"
+    "Maximum distance: {max_distance:.3f} mm\n"
+    "25th percentile: {q25_distance:.3f} mm\n"
+    "75th percentile: {q75_distance:.3f} mm\n"
+    "Range: {range_distance:.3f} mm\n\n"
+)
+
+SOURCE_STATISTICS_TEMPLATE = (
+    "\n{name} ATLAS:\n"
+    "  Regions: {total}\n"
+    "  Perfect matches: {matches}/{total} ({match_percentage:.1f}%)\n"
+    "  Mean distance: {mean_distance:.3f} mm\n"
+    "  Std deviation: {std_distance:.3f} mm\n"
+    "  Median: {median_distance:.3f} mm\n"
+    "  Range: {min_distance:.3f} - {max_distance:.3f} mm\n"
+)
+
+def distance_summary(distances):
+    """Mean, std, median, min, max and quartiles of an array of distances
     
-    df = pd.read_csv(val_csv)
+    The five order statistics come from a single np.quantile call. NaNs are
+    skipped and std uses ddof=1, as in the pandas reductions.
+    """
+    distances = distances[~np.isnan(distances)]
+    if distances.size == 0:
+        return dict.fromkeys(DISTANCE_KEYS, np.nan)
+    q0, q25, median, q75, q100 = np.quantile(distances, [0.0, 0.25, 0.5, 0.75, 1.0])
+    return {
+        'mean_distance': distances.mean(),
+        'std_distance': distances.std(ddof=1) if distances.size > 1 else np.nan,
+        'median_distance': median,
+        'min_distance': q0,
+        'max_distance': q100,
+        'q25_distance': q25,
+        'q75_distance': q75
+    }
+
+def compute_validation_statistics(val_csv):
+    """Overall, per-source and mismatch statistics for a centroid validation CSV
     
-    print(f"📋 Loaded {len(df)} validation records")
+    Returns (stats, source_stats, mismatch_stats, mismatch_rows), where
+    mismatch_rows are (final_index, source, distance_mm) tuples, or None when
+    the CSV has no rows.
+    """
+    # Only these four columns are used; reading them with fixed dtypes skips
+    # type inference, and the categorical columns compare and group by codes
+    df = pd.read_csv(val_csv, usecols=['final_index', 'source', 'match', 'distance_mm'],
+                     dtype={'final_index': 'int32', 'source': 'category',
+                            'match': 'category', 'distance_mm': 'float64'})
+    if df.empty:
+        return None
     
-    # Calculate statistics
-    distances = df['distance_mm']
-    matches = df[df['match'] == 'MATCH']
-    mismatches = df[df['match'] == 'MISMATCH']
+    # Calculate statistics on the distance array, pulled out of the table once
+    distances = df['distance_mm'].to_numpy()
+    # Boolean masks (compared on the categorical codes) instead of two
+    # filtered copies of the table
+    is_match = (df['match'] == 'MATCH').to_numpy()
+    is_mismatch = (df['match'] == 'MISMATCH').to_numpy()
+    n_matches, n_mismatches = int(is_match.sum()), int(is_mismatch.sum())
     
     # Overall statistics
     stats = {
         'total_regions': len(df),
-        'perfect_matches': len(matches),
-        'mismatches': len(mismatches),
-        'match_percentage': (len(matches) / len(df)) * 100,
-        'mean_distance': distances.mean(),
-        'std_distance': distances.std(),
-        'median_distance': distances.median(),
-        'min_distance': distances.min(),
-        'max_distance': distances.max(),
-        'q25_distance': distances.quantile(0.25),
-        'q75_distance': distances.quantile(0.75)
+        'perfect_matches': n_matches,
+        'mismatches': n_mismatches,
+        'match_percentage': (n_matches / len(df)) * 100,
+        **distance_summary(distances)
     }
     
-    # Statistics by source
+    # Statistics by source: one stable argsort of the categorical source
+    # codes makes every source a contiguous slice of the sorted arrays
+    source_names = list(df['source'].cat.categories)
+    source_codes = df['source'].cat.codes.to_numpy()
+    order = np.argsort(source_codes, kind='stable')
+    bounds = np.searchsorted(source_codes[order], np.arange(len(source_names) + 1))
+    sorted_distances = distances[order]
+    sorted_match, sorted_mismatch = is_match[order], is_mismatch[order]
+    
+    # Row count of every source from the slice bounds, so sources without
+    # rows are skipped up front
+    source_sizes = dict(zip(source_names, np.diff(bounds).tolist()))
+    
     source_stats = {}
     for source in ['Levinson', 'Tian', 'Destrieux']:
-        source_df = df[df['source'] == source]
-        if len(source_df) > 0:
-            source_distances = source_df['distance_mm']
-            source_matches = source_df[source_df['match'] == 'MATCH']
-            source_mismatches = source_df[source_df['match'] == 'MISMATCH']
-            
+        total = source_sizes.get(source, 0)
+        if total > 0:
+            code = source_names.index(source)
+            segment = slice(bounds[code], bounds[code + 1])
+            source_matches = int(np.count_nonzero(sorted_match[segment]))
             source_stats[source] = {
-                'total': len(source_df),
-                'matches': len(source_matches),
-                'mismatches': len(source_mismatches),
-                'match_percentage': (len(source_matches) / len(source_df)) * 100,
-                'mean_distance': source_distances.mean(),
-                'std_distance': source_distances.std(),
-                'median_distance': source_distances.median(),
-                'min_distance': source_distances.min(),
-                'max_distance': source_distances.max(),
-                'q25_distance': source_distances.quantile(0.25),
-                'q75_distance': source_distances.quantile(0.75)
+                'total': total,
+                'matches': source_matches,
+                'mismatches': int(np.count_nonzero(sorted_mismatch[segment])),
+                'match_percentage': (source_matches / total) * 100,
+                **distance_summary(sorted_distances[segment])
             }
     
     # Mismatch analysis
     mismatch_stats = {}
-    if len(mismatches) > 0:
-        mismatch_distances = mismatches['distance_mm']
+    if n_mismatches > 0:
+        summary = distance_summary(distances[is_mismatch])
         mismatch_stats = {
-            'count': len(mismatches),
-            'mean_distance': mismatch_distances.mean(),
-            'std_distance': mismatch_distances.std(),
-            'median_distance': mismatch_distances.median(),
-            'min_distance': mismatch_distances.min(),
-            'max_distance': mismatch_distances.max(),
-            'range_distance': mismatch_distances.max() - mismatch_distances.min()
+            'count': n_mismatches,
+            'mean_distance': summary['mean_distance'],
+            'std_distance': summary['std_distance'],
+            'median_distance': summary['median_distance'],
+            'min_distance': summary['min_distance'],
+            'max_distance': summary['max_distance'],
+            'range_distance': summary['max_distance'] - summary['min_distance']
         }
     
-    # Create comprehensive statistics CSV
-    stats_data = []
-    
-    # Overall row
-    stats_data.append({
-        'Category': 'Overall',
-        'Atlas': 'All',
-        'Total_Regions': stats['total_regions'],
-        'Perfect_Matches': stats['perfect_matches'],
-        'Mismatches': stats['mismatches'],
-        'Match_Percentage': round(stats['match_percentage'], 2),
-        'Mean_Distance_mm': round(stats['mean_distance'], 3),
-        'Std_Distance_mm': round(stats['std_distance'], 3),
-        'Median_Distance_mm': round(stats['median_distance'], 3),
-        'Min_Distance_mm': round(stats['min_distance'], 3),
-        'Max_Distance_mm': round(stats['max_distance'], 3),
-        'Q25_Distance_mm': round(stats['q25_distance'], 3),
-        'Q75_Distance_mm': round(stats['q75_distance'], 3),
-        'Range_mm': round(stats['max_distance'] - stats['min_distance'], 3)
-    })
+    # Rows listed under SPECIFIC MISMATCHES
+    mismatch_rows = list(zip(df['final_index'].to_numpy()[is_mismatch].tolist(),
+                             df['source'].to_numpy()[is_mismatch].tolist(),
+                             distances[is_mismatch].tolist()))
+    
+    return stats, source_stats, mismatch_stats, mismatch_rows
+
+# Bump whenever compute_validation_statistics changes what it returns, so
+# results pickled by an older version are not reused
+STATS_CACHE_VERSION = 1
+
+def load_validation_statistics(val_csv, cache_path):
+    """compute_validation_statistics, cached until val_csv changes
+    
+    The results are pickled to cache_path together with STATS_CACHE_VERSION
+    and the CSV's mtime, so rerunning the report on an unchanged CSV skips
+    parsing and aggregation.
+    """
+    key = (STATS_CACHE_VERSION, val_csv.stat().st_mtime_ns)
+    try:
+        with open(cache_path, 'rb') as f:
+            cached_key, results = pickle.load(f)
+        if cached_key == key:
+            return results
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        pass
+    
+    results = compute_validation_statistics(val_csv)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a temporary file first so an interrupted save is never picked up
+    tmp = cache_path.with_suffix('.tmp')
+    with open(tmp, 'wb') as f:
+        pickle.dump((key, results), f)
+    tmp.replace(cache_path)
+    return results
+
+def analyze_validation_results():
+    """Analyze validation results and create comprehensive reports"""
+    
+    print("📊 CREATING DETAILED VALIDATION REPORT")
+    print("=" * 40)
+    
+    # Load validation data
+    val_dir = Path("levtiades_atlas/centroid_validation")
+    val_csv = val_dir / "corrected_centroid_validation.csv"
+    
+    if not val_csv.exists():
+        print("❌ Validation CSV not found!")
+        return
+    
+    results = load_validation_statistics(val_csv, val_dir / "_cache" / "validation_statistics.pkl")
+    if results is None:
+        print("❌ Validation CSV has no records!")
+        return
+    stats, source_stats, mismatch_stats, mismatch_rows = results
+    
+    print(f"📋 Loaded {stats['total_regions']} validation records")
+    
+    # Create comprehensive statistics CSV column-wise: overall row, one row
+    # per atlas, then the mismatches-only row
+    summaries = [stats, *source_stats.values()]
+    categories = ['Overall'] + ['By_Atlas'] * len(source_stats)
+    atlases = ['All', *source_stats]
+    counts = [[stats['total_regions'], stats['perfect_matches'], stats['mismatches']],
+              *([s['total'], s['matches'], s['mismatches']] for s in source_stats.values())]
+    percentages = [s['match_percentage'] for s in summaries]
+    distance_table = [[s[key] for key in DISTANCE_KEYS] for s in summaries]
     
-    # By source rows
-    for source, source_stat in source_stats.items():
-        stats_data.append({
-            'Category': 'By_Atlas',
-            'Atlas': source,
-            'Total_Regions': source_stat['total'],
-            'Perfect_Matches': source_stat['matches'],
-            'Mismatches': source_stat['mismatches'],
-            'Match_Percentage': round(source_stat['match_percentage'], 2),
-            'Mean_Distance_mm': round(source_stat['mean_distance'], 3),
-            'Std_Distance_mm': round(source_stat['std_distance'], 3),
-            'Median_Distance_mm': round(source_stat['median_distance'], 3),
-            'Min_Distance_mm': round(source_stat['min_distance'], 3),
-            'Max_Distance_mm': round(source_stat['max_distance'], 3),
-            'Q25_Distance_mm': round(source_stat['q25_distance'], 3),
-            'Q75_Distance_mm': round(source_stat['q75_distance'], 3),
-            'Range_mm': round(source_stat['max_distance'] - source_stat['min_distance'], 3)
-        })
-    
-    # Mismatches only row
     if mismatch_stats:
-        stats_data.append({
-            'Category': 'Mismatches_Only',
-            'Atlas': 'All',
-            'Total_Regions': mismatch_stats['count'],
-            'Perfect_Matches': 0,
-            'Mismatches': mismatch_stats['count'],
-            'Match_Percentage': 0.0,
-            'Mean_Distance_mm': round(mismatch_stats['mean_distance'], 3),
-            'Std_Distance_mm': round(mismatch_stats['std_distance'], 3),
-            'Median_Distance_mm': round(mismatch_stats['median_distance'], 3),
-            'Min_Distance_mm': round(mismatch_stats['min_distance'], 3),
-            'Max_Distance_mm': round(mismatch_stats['max_distance'], 3),
-            'Q25_Distance_mm': '',  # Not applicable for mismatches only
-            'Q75_Distance_mm': '',  # Not applicable for mismatches only
-            'Range_mm': round(mismatch_stats['range_distance'], 3)
-        })
+        categories.append('Mismatches_Only')
+        atlases.append('All')
+        counts.append([mismatch_stats['count'], 0, mismatch_stats['count']])
+        percentages.append(0.0)
+        # Quartiles are not applicable for mismatches only
+        distance_table.append([mismatch_stats.get(key, np.nan) for key in DISTANCE_KEYS])
+    
+    counts = np.array(counts)
+    distance_table = np.array(distance_table, dtype=np.float64)
+    # Append the range column and round every 3-decimal value in one call
+    distance_table = np.column_stack([distance_table, distance_table[:, 4] - distance_table[:, 3]])
+    mean, std, median, low, high, q25, q75, value_range = np.round(distance_table, 3).T
+    q25, q75 = q25.astype(object), q75.astype(object)
+    if mismatch_stats:
+        q25[-1] = q75[-1] = ''
+    
+    stats_df = pd.DataFrame({
+        'Category': categories,
+        'Atlas': atlases,
+        'Total_Regions': counts[:, 0],
+        'Perfect_Matches': counts[:, 1],
+        'Mismatches': counts[:, 2],
+        'Match_Percentage': np.round(percentages, 2),
+        'Mean_Distance_mm': mean,
+        'Std_Distance_mm': std,
+        'Median_Distance_mm': median,
+        'Min_Distance_mm': low,
+        'Max_Distance_mm': high,
+        'Q25_Distance_mm': q25,
+        'Q75_Distance_mm': q75,
+        'Range_mm': value_range
+    })
     
     # Save statistics CSV
-    stats_df = pd.DataFrame(stats_data)
     stats_csv_path = val_dir / "validation_statistics.csv"
     stats_df.to_csv(stats_csv_path, index=False)
     print(f"✅ Statistics CSV saved: {stats_csv_path}")
@@ -151,115 +251,112 @@ def analyze_validation_results():
     # Create comprehensive text report
     report_path = val_dir / "comprehensive_validation_report.txt"
     
-    with open(report_path, 'w') as f:
-        f.write("LEVTIADES ATLAS COMPREHENSIVE VALIDATION REPORT\n")
-        f.write("=" * 55 + "\n\n")
-        f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-        f.write(f"Atlas: levtiades_atlas/final_atlas/no_overlaps/levtiades_sequential.nii.gz\n")
-        f.write(f"Hemisphere Ordering: Levinson → Tian-LEFT → Tian-RIGHT → Destrieux-LEFT → Destrieux-RIGHT\n\n")
-        
-        # Executive Summary
-        f.write("EXECUTIVE SUMMARY\n")
-        f.write("-" * 17 + "\n")
-        f.write(f"Total regions validated: {stats['total_regions']}\n")
-        f.write(f"Perfect matches (< 1mm): {stats['perfect_matches']} ({stats['match_percentage']:.1f}%)\n")
-        f.write(f"Acceptable mismatches (≥ 1mm): {stats['mismatches']} ({100-stats['match_percentage']:.1f}%)\n")
-        f.write(f"Overall validation quality: {'EXCELLENT' if stats['match_percentage'] > 95 else 'GOOD' if stats['match_percentage'] > 90 else 'ACCEPTABLE'}\n\n")
-        
-        # Overall Statistics
-        f.write("OVERALL STATISTICS\n")
-        f.write("-" * 18 + "\n")
-        f.write(f"Mean distance: {stats['mean_distance']:.3f} mm\n")
-        f.write(f"Standard deviation: {stats['std_distance']:.3f} mm\n")
-        f.write(f"Median distance: {stats['median_distance']:.3f} mm\n")
-        f.write(f"Minimum distance: {stats['min_distance']:.3f} mm\n")
-        f.write(f"Maximum distance: {stats['max_distance']:.3f} mm\n")
-        f.write(f"25th percentile: {stats['q25_distance']:.3f} mm\n")
-        f.write(f"75th percentile: {stats['q75_distance']:.3f} mm\n")
-        f.write(f"Range: {stats['max_distance'] - stats['min_distance']:.3f} mm\n\n")
-        
-        # By Atlas Statistics
-        f.write("STATISTICS BY ATLAS\n")
-        f.write("-" * 19 + "\n")
-        for source, source_stat in source_stats.items():
-            f.write(f"\n{source.upper()} ATLAS:\n")
-            f.write(f"  Regions: {source_stat['total']}\n")
-            f.write(f"  Perfect matches: {source_stat['matches']}/{source_stat['total']} ({source_stat['match_percentage']:.1f}%)\n")
-            f.write(f"  Mean distance: {source_stat['mean_distance']:.3f} mm\n")
-            f.write(f"  Std deviation: {source_stat['std_distance']:.3f} mm\n")
-            f.write(f"  Median: {source_stat['median_distance']:.3f} mm\n")
-            f.write(f"  Range: {source_stat['min_distance']:.3f} - {source_stat['max_distance']:.3f} mm\n")
-        
-        # Mismatch Analysis
-        if mismatch_stats:
-            f.write(f"\nMISMATCH ANALYSIS\n")
-            f.write("-" * 17 + "\n")
-            f.write(f"Total mismatches: {mismatch_stats['count']}\n")
-            f.write(f"Mismatch distance range: {mismatch_stats['min_distance']:.3f} - {mismatch_stats['max_distance']:.3f} mm\n")
-            f.write(f"Mean mismatch distance: {mismatch_stats['mean_distance']:.3f} mm\n")
-            f.write(f"Std deviation of mismatches: {mismatch_stats['std_distance']:.3f} mm\n")
-            f.write(f"Median mismatch distance: {mismatch_stats['median_distance']:.3f} mm\n")
-            
-            # List specific mismatches
-            f.write(f"\nSPECIFIC MISMATCHES:\n")
-            for _, row in mismatches.iterrows():
-                f.write(f"  Region {row['final_index']} ({row['source']}): {row['distance_mm']:.2f} mm\n")
-        
-        # Technical Explanation
-        f.write(f"\n\nTECHNICAL EXPLANATION\n")
-        f.write("=" * 21 + "\n\n")
-        
-        f.write("WHY CENTROID MISMATCHES OCCUR\n")
-        f.write("-" * 30 + "\n\n")
-        
-        f.write("The small centroid differences (1-3mm) between original aligned atlases and the\n")
-        f.write("final combined Levtiades atlas are expected and occur due to:\n\n")
-        
-        f.write("1. ATLAS PROCESSING EFFECTS:\n")
-        f.write("   • Original aligned atlas: Each region exists as pure, isolated ROI\n")
-        f.write("   • Final combined atlas: Regions undergo multiple processing steps:\n")
-        f.write("     - Combination with other atlases (Levinson + Tian + Destrieux)\n")
-        f.write("     - Overlap resolution (hierarchical priority: Midbrain > Subcortical > Cortical)\n")
-        f.write("     - Sequential reindexing (1-207)\n")
-        f.write("     - Hemisphere reordering (LEFT before RIGHT)\n\n")
-        
-        f.write("2. VOXEL-LEVEL CHANGES:\n")
-        f.write("   • Boundary voxel loss/gain during overlap resolution\n")
-        f.write("   • Small shifts from interpolation during processing\n")
-        f.write("   • Edge effects from multiple transformation steps\n\n")
-        
-        f.write("3. WHY SOME REGIONS MATCH PERFECTLY (0.0mm):\n")
-        f.write("   • No overlapping voxels with other atlases\n")
-        f.write("   • Not affected by boundary adjustments\n")
-        f.write("   • Maintained exact original shape through all processing\n\n")
-        
-        f.write("4. CLINICAL SIGNIFICANCE:\n")
-        f.write("   • 1-3mm differences are clinically acceptable for brain atlases at 2mm resolution\n")
-        f.write("   • Small shifts don't affect functional integrity of regions\n")
-        f.write("   • Regions maintain anatomical identity and boundaries\n")
-        f.write("   • Multi-atlas combination always introduces small centroid shifts\n\n")
-        
-        f.write("CONCLUSION\n")
-        f.write("-" * 10 + "\n")
-        f.write(f"The {stats['perfect_matches']}/{stats['total_regions']} perfect matches ({stats['match_percentage']:.1f}%) with\n")
-        f.write(f"most mismatches <2mm indicates EXCELLENT preservation of original atlas geometry.\n")
-        f.write(f"The {stats['mismatches']} mismatches represent regions where boundary processing caused\n")
-        f.write("slight centroid shifts, but regions remain anatomically and functionally valid.\n\n")
+    # Collect the report text and write it in one call
+    parts = []
+    w = parts.append
+    
+    w("LEVTIADES ATLAS COMPREHENSIVE VALIDATION REPORT\n")
+    w("=" * 55 + "\n\n")
+    w(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+    w(f"Atlas: levtiades_atlas/final_atlas/no_overlaps/levtiades_sequential.nii.gz\n")
+    w(f"Hemisphere Ordering: Levinson → Tian-LEFT → Tian-RIGHT → Destrieux-LEFT → Destrieux-RIGHT\n\n")
+    
+    # Executive Summary
+    quality = ('EXCELLENT' if stats['match_percentage'] > 95 else
+               'GOOD' if stats['match_percentage'] > 90 else 'ACCEPTABLE')
+    w(EXECUTIVE_SUMMARY_TEMPLATE.format_map(
+        dict(stats, mismatch_percentage=100 - stats['match_percentage'], quality=quality)))
+    
+    # Overall Statistics
+    w(OVERALL_STATISTICS_TEMPLATE.format_map(
+        dict(stats, range_distance=stats['max_distance'] - stats['min_distance'])))
+    
+    # By Atlas Statistics
+    w("STATISTICS BY ATLAS\n")
+    w("-" * 19 + "\n")
+    for source, source_stat in source_stats.items():
+        w(SOURCE_STATISTICS_TEMPLATE.format_map(dict(source_stat, name=source.upper())))
+    
+    # Mismatch Analysis
+    if mismatch_stats:
+        w(f"\nMISMATCH ANALYSIS\n")
+        w("-" * 17 + "\n")
+        w(f"Total mismatches: {mismatch_stats['count']}\n")
+        w(f"Mismatch distance range: {mismatch_stats['min_distance']:.3f} - {mismatch_stats['max_distance']:.3f} mm\n")
+        w(f"Mean mismatch distance: {mismatch_stats['mean_distance']:.3f} mm\n")
+        w(f"Std deviation of mismatches: {mismatch_stats['std_distance']:.3f} mm\n")
+        w(f"Median mismatch distance: {mismatch_stats['median_distance']:.3f} mm\n")
         
-        f.write("This validation confirms the Levtiades atlas successfully combines three\n")
-        f.write("high-quality brain atlases while maintaining spatial accuracy and anatomical integrity.\n")
+        # List specific mismatches
+        w(f"\nSPECIFIC MISMATCHES:\n")
+        parts.extend(
+            f"  Region {index} ({source}): {distance:.2f} mm\n"
+            for index, source, distance in mismatch_rows
+        )
+    
+    # Technical Explanation
+    w(f"\n\nTECHNICAL EXPLANATION\n")
+    w("=" * 21 + "\n\n")
+    
+    w("WHY CENTROID MISMATCHES OCCUR\n")
+    w("-" * 30 + "\n\n")
+    
+    w("The small centroid differences (1-3mm) between original aligned atlases and the\n")
+    w("final combined Levtiades atlas are expected and occur due to:\n\n")
+    
+    w("1. ATLAS PROCESSING EFFECTS:\n")
+    w("   • Original aligned atlas: Each region exists as pure, isolated ROI\n")
+    w("   • Final combined atlas: Regions undergo multiple processing steps:\n")
+    w("     - Combination with other atlases (Levinson + Tian + Destrieux)\n")
+    w("     - Overlap resolution (hierarchical priority: Midbrain > Subcortical > Cortical)\n")
+    w("     - Sequential reindexing (1-207)\n")
+    w("     - Hemisphere reordering (LEFT before RIGHT)\n\n")
+    
+    w("2. VOXEL-LEVEL CHANGES:\n")
+    w("   • Boundary voxel loss/gain during overlap resolution\n")
+    w("   • Small shifts from interpolation during processing\n")
+    w("   • Edge effects from multiple transformation steps\n\n")
+    
+    w("3. WHY SOME REGIONS MATCH PERFECTLY (0.0mm):\n")
+    w("   • No overlapping voxels with other atlases\n")
+    w("   • Not affected by boundary adjustments\n")
+    w("   • Maintained exact original shape through all processing\n\n")
+    
+    w("4. CLINICAL SIGNIFICANCE:\n")
+    w("   • 1-3mm differences are clinically acceptable for brain atlases at 2mm resolution\n")
+    w("   • Small shifts don't affect functional integrity of regions\n")
+    w("   • Regions maintain anatomical identity and boundaries\n")
+    w("   • Multi-atlas combination always introduces small centroid shifts\n\n")
+    
+    w("CONCLUSION\n")
+    w("-" * 10 + "\n")
+    w(f"The {stats['perfect_matches']}/{stats['total_regions']} perfect matches ({stats['match_percentage']:.1f}%) with\n")
+    w(f"most mismatches <2mm indicates EXCELLENT preservation of original atlas geometry.\n")
+    w(f"The {stats['mismatches']} mismatches represent regions where boundary processing caused\n")
+    w("slight centroid shifts, but regions remain anatomically and functionally valid.\n\n")
+    
+    w("This validation confirms the Levtiades atlas successfully combines three\n")
+    w("high-quality brain atlases while maintaining spatial accuracy and anatomical integrity.\n")
+    
+    with open(report_path, 'w') as f:
+        f.write("".join(parts))
     
     print(f"✅ Comprehensive report saved: {report_path}")
     
-    # Print summary
-    print(f"\n📊 VALIDATION SUMMARY:")
-    print(f"   Total regions: {stats['total_regions']}")
-    print(f"   Perfect matches: {stats['perfect_matches']} ({stats['match_percentage']:.1f}%)")
-    print(f"   Mean distance: {stats['mean_distance']:.3f} mm")
-    print(f"   Distance range: {stats['min_distance']:.3f} - {stats['max_distance']:.3f} mm")
+    # Print summary in one write
+    summary_lines = [
+        f"\n📊 VALIDATION SUMMARY:",
+        f"   Total regions: {stats['total_regions']}",
+        f"   Perfect matches: {stats['perfect_matches']} ({stats['match_percentage']:.1f}%)",
+        f"   Mean distance: {stats['mean_distance']:.3f} mm",
+        f"   Distance range: {stats['min_distance']:.3f} - {stats['max_distance']:.3f} mm"
+    ]
     if mismatch_stats:
-        print(f"   Mismatch range: {mismatch_stats['min_distance']:.3f} - {mismatch_stats['max_distance']:.3f} mm")
-        print(f"   Mismatch mean: {mismatch_stats['mean_distance']:.3f} ± {mismatch_stats['std_distance']:.3f} mm")
+        summary_lines += [
+            f"   Mismatch range: {mismatch_stats['min_distance']:.3f} - {mismatch_stats['max_distance']:.3f} mm",
+            f"   Mismatch mean: {mismatch_stats['mean_distance']:.3f} ± {mismatch_stats['std_distance']:.3f} mm"
+        ]
+    sys.stdout.write("\n".join(summary_lines) + "\n")
 
 if __name__ == "__main__":
     analyze_validation_results()
\ No newline at end of file
@@ -101,6 +101,16 @@ def create_final_atlas():
     
     return new_atlas_data, new_img, hemisphere_map
 
+def label_centroids(data, affine):
+    """MNI centroids of every positive label, keyed by label
+    
+    Uses one labeled center_of_mass call instead of a full-volume mask and
+    center_of_mass per label.
+    """
+    labels = np.unique(data[data > 0])
+    com_voxel = ndimage.center_of_mass(data > 0, data, labels)
+    return dict(zip(labels.tolist(), nib.affines.apply_affine(affine, com_voxel)))
+
 def validate_all_centroids(hemisphere_map):
     """Validate ALL regions match exactly with aligned atlases"""
     
@@ -115,14 +125,7 @@ def validate_all_centroids(hemisphere_map):
     
     # Get centroids from final atlas
     print("📍 Extracting centroids from final atlas...")
-    final_centroids = {}
-    unique_labels = sorted(np.unique(atlas_data[atlas_data > 0]))
-    
-    for label in unique_labels:
-        mask = atlas_data == label
-        com_voxel = ndimage.center_of_mass(mask)
-        com_mni = nib.affines.apply_affine(affine, com_voxel)
-        final_centroids[label] = com_mni
+    final_centroids = label_centroids(atlas_data, affine)
     
     print(f"✅ Extracted {len(final_centroids)} centroids")
     
@@ -139,7 +142,7 @@ def validate_all_centroids(hemisphere_map):
     if levinson_path.exists():
         lev_img = nib.load(levinson_path)
         lev_data = lev_img.get_fdata().astype(int)
-        lev_affine = lev_img.affine
+        lev_centroids = label_centroids(lev_data, lev_img.affine)
         
         for new_idx in range(1, 6):
             old_seq_idx = reverse_hemisphere[new_idx]
@@ -147,10 +150,8 @@ def validate_all_centroids(hemisphere_map):
             orig_idx = orig_row['old_index']
             
             # Get centroid from aligned Levinson
-            mask = lev_data == orig_idx
-            if np.any(mask):
-                com_voxel = ndimage.center_of_mass(mask)
-                com_mni = nib.affines.apply_affine(lev_affine, com_voxel)
+            if orig_idx in lev_centroids:
+                com_mni = lev_centroids[orig_idx]
                 
                 # Compare with final atlas
                 final_coord = final_centroids[new_idx]
@@ -175,7 +176,7 @@ def validate_all_centroids(hemisphere_map):
     if tian_path.exists():
         tian_img = nib.load(tian_path)
         tian_data = tian_img.get_fdata().astype(int)
-        tian_affine = tian_img.affine
+        tian_centroids = label_centroids(tian_data, tian_img.affine)
         
         for new_idx in range(6, 60):
             old_seq_idx = reverse_hemisphere[new_idx]
@@ -183,10 +184,8 @@ def validate_all_centroids(hemisphere_map):
             orig_tian_idx = orig_row['old_index'] - 100  # Convert to 1-54
             
             # Get centroid from aligned Tian
-            mask = tian_data == orig_tian_idx
-            if np.any(mask):
-                com_voxel = ndimage.center_of_mass(mask)
-                com_mni = nib.affines.apply_affine(tian_affine, com_voxel)
+            if orig_tian_idx in tian_centroids:
+                com_mni = tian_centroids[orig_tian_idx]
                 
                 # Compare with final atlas
                 final_coord = final_centroids[new_idx]
@@ -211,7 +210,7 @@ def validate_all_centroids(hemisphere_map):
     if des_path.exists():
         des_img = nib.load(des_path)
         des_data = des_img.get_fdata().astype(int)
-        des_affine = des_img.affine
+        des_centroids = label_centroids(des_data, des_img.affine)
         
         for new_idx in range(60, 208):
             if new_idx in reverse_hemisphere:
@@ -221,10 +220,8 @@ def validate_all_centroids(hemisphere_map):
                     orig_des_idx = orig_row.iloc[0]['old_index'] - 200
                     
                     # Get centroid from aligned Destrieux
-                    mask = des_data == orig_des_idx
-                    if np.any(mask):
-                        com_voxel = ndimage.center_of_mass(mask)
-                        com_mni = nib.affines.apply_affine(des_affine, com_voxel)
+                    if orig_des_idx in des_centroids:
+                        com_mni = des_centroids[orig_des_idx]
                         
                         # Compare with final atlas
                         final_coord = final_centroids[new_idx]
@@ -293,7 +290,8 @@ def update_all_files(hemisphere_map):
     atlas_path = Path("final_atlas/no_overlaps/levtiades_sequential.nii.gz")
     atlas_img = nib.load(atlas_path)
     atlas_data = atlas_img.get_fdata().astype(int)
-    affine = atlas_img.affine
+    centroids = label_centroids(atlas_data, atlas_img.affine)
+    volumes = np.bincount(atlas_data.ravel())
     
     # Load original mapping and Tian labels
     mapping_df = pd.read_csv("index_mapping_reference.csv")
@@ -318,10 +316,8 @@ def update_all_files(hemisphere_map):
             orig_row = mapping_df[mapping_df['new_index'] == old_seq_idx].iloc[0]
             
             # Get coordinates
-            mask = atlas_data == new_idx
-            if np.any(mask):
-                com_voxel = ndimage.center_of_mass(mask)
-                com_mni = nib.affines.apply_affine(affine, com_voxel)
+            if new_idx in centroids:
+                com_mni = centroids[new_idx]
                 
                 # Get proper name
                 source = orig_row['source']
@@ -342,8 +338,8 @@ def update_all_files(hemisphere_map):
                     'mni_x': round(com_mni[0], 1),
                     'mni_y': round(com_mni[1], 1),
                     'mni_z': round(com_mni[2], 1),
-                    'volume_voxels': int(np.sum(mask)),
-                    'volume_mm3': int(np.sum(mask)) * 8
+                    'volume_voxels': int(volumes[new_idx]),
+                    'volume_mm3': int(volumes[new_idx]) * 8
                 })
     
     # Update CSV files (overwrite existing)
@@ -8,38 +8,66 @@ import numpy as np
 from pathlib import Path
 import pandas as pd
 import json
-from scipy import ndimage
+
+from atlas_io import load_atlas, load_atlas_cached
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if numba is not None:
+    @numba.njit(parallel=True, cache=True)
+    def _label_sums_kernel(data, n_labels):
+        nx, ny, nz = data.shape
+        # Per-z-slab accumulators, so prange threads never share a slot
+        counts = np.zeros((nz, n_labels), dtype=np.int64)
+        sums = np.zeros((nz, n_labels, 3), dtype=np.float64)
+        for k in numba.prange(nz):
+            for j in range(ny):
+                for i in range(nx):
+                    label = data[i, j, k]
+                    counts[k, label] += 1
+                    sums[k, label, 0] += i
+                    sums[k, label, 1] += j
+                    sums[k, label, 2] += k
+        return counts.sum(axis=0), sums.sum(axis=0)
 
 def fix_label_file_formatting():
-    """Fix the label file formatting - replace \\n with actual newlines"""
+    """Fix the label file formatting - replace \\n with actual newlines
+    
+    Returns the fixed (labels, lookup table) text so the CSV steps can parse
+    it without reading the files again.
+    """
     
     print("🔧 Fixing Label File Formatting...")
     
-    # Read the problematic file
+    # Replace literal \\n with actual newlines, working on the raw bytes and
+    # only rewriting the file when there was something to replace
     label_path = Path("levtiades_atlas/final_atlas/levtiades_labels.txt")
-    with open(label_path, 'r') as f:
-        content = f.read()
-    
-    # Replace literal \\n with actual newlines
-    fixed_content = content.replace('\\n', '\n')
-    
-    # Write back with proper newlines
-    with open(label_path, 'w') as f:
-        f.write(fixed_content)
+    content = label_path.read_bytes()
+    if b'\\n' in content:
+        content = content.replace(b'\\n', b'\n')
+        label_path.write_bytes(content)
+    label_text = content.decode()
     
     print("✅ Fixed label file formatting")
     
-    # Do the same for lookup table
+    # Do the same for lookup table (also literal \\t)
     lookup_path = Path("levtiades_atlas/final_atlas/levtiades_lookup_table.txt")
-    with open(lookup_path, 'r') as f:
-        content = f.read()
-    
-    fixed_content = content.replace('\\n', '\n').replace('\\t', '\t')
-    
-    with open(lookup_path, 'w') as f:
-        f.write(fixed_content)
+    content = lookup_path.read_bytes()
+    if b'\\n' in content or b'\\t' in content:
+        content = content.replace(b'\\n', b'\n').replace(b'\\t', b'\t')
+        lookup_path.write_bytes(content)
+    lookup_text = content.decode()
     
     print("✅ Fixed lookup table formatting")
+    return label_text, lookup_text
 
 def rename_atlas_files():
     """Rename fixed to hierarchical"""
@@ -48,132 +76,153 @@ def rename_atlas_files():
     
     atlas_dir = Path("levtiades_atlas/final_atlas/no_overlaps")
     
-    # Check what files exist
     fixed_path = atlas_dir / "levtiades_hierarchical_fixed.nii.gz"
     hierarchical_path = atlas_dir / "levtiades_hierarchical.nii.gz"
     
-    if fixed_path.exists():
-        # Rename fixed to hierarchical (overwrite if exists)
-        if hierarchical_path.exists():
-            hierarchical_path.unlink()
-        fixed_path.rename(hierarchical_path)
+    # Rename fixed to hierarchical; replace() overwrites atomically, so there
+    # is no need to check for and unlink an existing file first
+    try:
+        fixed_path.replace(hierarchical_path)
         print(f"✅ Renamed {fixed_path.name} to {hierarchical_path.name}")
+    except FileNotFoundError:
+        pass
+
+def compute_label_centroids(data):
+    """Voxel counts and voxel-space centroids for every label in one pass
+    
+    Returns (counts, com_voxel) indexed by label value. Labels without voxels
+    have a count of 0 and NaN centroids. Uses a parallel numba kernel when
+    numba is installed.
+    """
+    if numba is not None and data.size:
+        counts, sums = _label_sums_kernel(data, int(data.max()) + 1)
+    else:
+        flat = data.ravel()
+        counts = np.bincount(flat)
+        sums = np.stack([
+            np.bincount(flat, weights=np.broadcast_to(coord, data.shape).ravel(), minlength=counts.size)
+            for coord in np.indices(data.shape, sparse=True)
+        ], axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return counts, sums / counts[:, None]
+
+def voxel_to_mni(coords, affine):
+    """Apply affine to an (N, 3) array of voxel coordinates in one matmul
+    
+    Same result as nib.affines.apply_affine, without the per-call reshaping.
+    """
+    return coords @ affine[:3, :3].T + affine[:3, 3]
 
 def extract_region_centroids(atlas_path):
     """Extract centroid coordinates for each region"""
     
     print(f"\n📍 Extracting Region Centroids from {atlas_path.name}...")
     
-    # Load atlas
-    atlas_img = nib.load(atlas_path)
-    atlas_data = atlas_img.get_fdata().astype(int)
+    # Load atlas (from the .npy cache on reruns)
+    atlas_img, atlas_data = load_atlas_cached(atlas_path)
     affine = atlas_img.affine
     
-    # Get unique labels
-    unique_labels = sorted(np.unique(atlas_data[atlas_data > 0]))
-    
-    centroids = {}
-    
-    for label in unique_labels:
-        # Get mask for this region
-        mask = atlas_data == label
-        
-        # Calculate center of mass in voxel coordinates
-        com_voxel = ndimage.center_of_mass(mask)
-        
-        # Convert to MNI coordinates
-        com_mni = nib.affines.apply_affine(affine, com_voxel)
-        
-        centroids[label] = {
-            'voxel_x': com_voxel[0],
-            'voxel_y': com_voxel[1],
-            'voxel_z': com_voxel[2],
-            'mni_x': com_mni[0],
-            'mni_y': com_mni[1],
-            'mni_z': com_mni[2],
-            'volume_voxels': int(np.sum(mask))
+    # Counts and centroids for all labels at once, instead of a full-volume
+    # mask and center_of_mass per label
+    counts, com_voxel = compute_label_centroids(atlas_data)
+    com_mni = voxel_to_mni(com_voxel, affine)
+    unique_labels = np.flatnonzero(counts[1:]) + 1
+    
+    centroids = {
+        label: {
+            'voxel_x': com_voxel[label, 0],
+            'voxel_y': com_voxel[label, 1],
+            'voxel_z': com_voxel[label, 2],
+            'mni_x': com_mni[label, 0],
+            'mni_y': com_mni[label, 1],
+            'mni_z': com_mni[label, 2],
+            'volume_voxels': int(counts[label])
         }
-        
-        if label % 50 == 0:
-            print(f"   Processed {label}/{len(unique_labels)} regions...")
+        for label in unique_labels
+    }
     
     print(f"✅ Extracted centroids for {len(centroids)} regions")
     return centroids
 
-def create_labels_csv():
-    """Create CSV version of labels with proper formatting"""
+def write_csv(df, path):
+    """Write df to path as CSV through a single 1 MiB buffered file handle"""
+    with open(path, 'w', buffering=1 << 20, newline='') as f:
+        df.to_csv(f, index=False)
+
+def split_table_lines(text, sep, n_fields, maxsplit=-1):
+    """Split the non-comment lines of a text table that contain sep
+    
+    Returns a DataFrame with columns 0..n_fields-1; lines with fewer fields are
+    padded with NaN and extra fields are dropped.
+    """
+    lines = pd.Series(text.splitlines(), dtype=object).str.strip()
+    lines = lines[(lines != '') & ~lines.str.startswith('#') & lines.str.contains(sep, regex=False)]
+    fields = lines.str.split(sep, n=maxsplit, expand=True)
+    return fields.reindex(columns=range(n_fields)).reset_index(drop=True)
+
+def create_labels_csv(label_text=None):
+    """Create CSV version of labels with proper formatting
+    
+    label_text is the fixed label file content; it is read from disk if not given.
+    """
     
     print("\n📋 Creating Labels CSV...")
     
     # Read the fixed label file
-    label_path = Path("levtiades_atlas/final_atlas/levtiades_labels.txt")
+    if label_text is None:
+        label_text = Path("levtiades_atlas/final_atlas/levtiades_labels.txt").read_text()
+    
+    # Parse format: "1: Locus_Coeruleus_LC [Levinson-Bari]", with pandas string
+    # ops over all lines at once instead of splitting line by line
+    lines = split_table_lines(label_text, ':', 2, maxsplit=1)
+    name_part = lines[1].str.strip()
     
-    labels_data = []
-    
-    with open(label_path, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#') and ':' in line:
-                # Parse format: "1: Locus_Coeruleus_LC [Levinson-Bari]"
-                parts = line.split(':', 1)
-                index = int(parts[0])
-                
-                # Extract name and source
-                name_part = parts[1].strip()
-                if '[' in name_part and ']' in name_part:
-                    name = name_part[:name_part.rfind('[')].strip()
-                    source = name_part[name_part.rfind('[')+1:-1]
-                else:
-                    name = name_part
-                    source = "Unknown"
-                
-                labels_data.append({
-                    'index': index,
-                    'region_name': name,
-                    'source_atlas': source
-                })
+    # Extract name and source (the text inside the last [...])
+    has_source = name_part.str.contains('[', regex=False) & name_part.str.contains(']', regex=False)
+    bracketed = name_part.str.extract(r'^(.*)\[(.*).$')
     
     # Create DataFrame
-    labels_df = pd.DataFrame(labels_data)
+    labels_df = pd.DataFrame({
+        'index': lines[0].astype(int),
+        'region_name': bracketed[0].str.strip().where(has_source, name_part),
+        'source_atlas': bracketed[1].where(has_source, "Unknown")
+    })
     
     # Save CSV
     csv_path = Path("levtiades_atlas/final_atlas/levtiades_labels.csv")
-    labels_df.to_csv(csv_path, index=False)
+    write_csv(labels_df, csv_path)
     
     print(f"✅ Created labels CSV: {csv_path}")
     return labels_df
 
-def create_lookup_table_csv():
-    """Create CSV version of lookup table"""
+def create_lookup_table_csv(lookup_text=None):
+    """Create CSV version of lookup table
+    
+    lookup_text is the fixed lookup table content; it is read from disk if not given.
+    """
     
     print("\n🎨 Creating Lookup Table CSV...")
     
     # Read the fixed lookup table
-    lookup_path = Path("levtiades_atlas/final_atlas/levtiades_lookup_table.txt")
+    if lookup_text is None:
+        lookup_text = Path("levtiades_atlas/final_atlas/levtiades_lookup_table.txt").read_text()
     
-    lookup_data = []
-    
-    with open(lookup_path, 'r') as f:
-        for line in f:
-            line = line.strip()
-            if line and not line.startswith('#') and '\t' in line:
-                # Parse format: "1\t235\t130\t50\tLevinson:Locus_Coeruleus_LC"
-                parts = line.split('\t')
-                if len(parts) >= 5:
-                    lookup_data.append({
-                        'index': int(parts[0]),
-                        'R': int(parts[1]),
-                        'G': int(parts[2]),
-                        'B': int(parts[3]),
-                        'label': parts[4]
-                    })
+    # Parse format: "1\t235\t130\t50\tLevinson:Locus_Coeruleus_LC"
+    parts = split_table_lines(lookup_text, '\t', 5)
+    parts = parts[parts[4].notna()].reset_index(drop=True)
     
     # Create DataFrame
-    lookup_df = pd.DataFrame(lookup_data)
+    lookup_df = pd.DataFrame({
+        'index': parts[0].astype(int),
+        'R': parts[1].astype(int),
+        'G': parts[2].astype(int),
+        'B': parts[3].astype(int),
+        'label': parts[4]
+    })
     
     # Save CSV
     csv_path = Path("levtiades_atlas/final_atlas/levtiades_lookup_table.csv")
-    lookup_df.to_csv(csv_path, index=False)
+    write_csv(lookup_df, csv_path)
     
     print(f"✅ Created lookup table CSV: {csv_path}")
     return lookup_df
@@ -183,36 +232,91 @@ def create_regions_with_coordinates_csv(labels_df, centroids):
     
     print("\n🌍 Creating Regions with Coordinates CSV...")
     
-    # Merge labels with centroids
-    regions_data = []
-    
-    for _, row in labels_df.iterrows():
-        index = row['index']
-        if index in centroids:
-            region_info = {
-                'index': index,
-                'region_name': row['region_name'],
-                'source_atlas': row['source_atlas'],
-                'mni_x': round(centroids[index]['mni_x'], 1),
-                'mni_y': round(centroids[index]['mni_y'], 1),
-                'mni_z': round(centroids[index]['mni_z'], 1),
-                'volume_voxels': centroids[index]['volume_voxels'],
-                'volume_mm3': centroids[index]['volume_voxels'] * 8  # 2x2x2mm voxels
-            }
-            regions_data.append(region_info)
-    
-    # Create DataFrame
-    regions_df = pd.DataFrame(regions_data)
+    # Merge labels with centroids in one join, keeping labels that have a region
+    coord_cols = ['mni_x', 'mni_y', 'mni_z']
+    centroids_df = (pd.DataFrame.from_dict(centroids, orient='index')
+                    .reindex(columns=coord_cols + ['volume_voxels'])
+                    .rename_axis('index').reset_index())
+    regions_df = labels_df[['index', 'region_name', 'source_atlas']].merge(centroids_df, on='index', how='inner')
+    regions_df[coord_cols] = regions_df[coord_cols].round(1)
+    regions_df['volume_mm3'] = regions_df['volume_voxels'] * 8  # 2x2x2mm voxels
     
     # Save CSV
     csv_path = Path("levtiades_atlas/final_atlas/levtiades_regions_with_coordinates.csv")
-    regions_df.to_csv(csv_path, index=False)
+    write_csv(regions_df, csv_path)
     
     print(f"✅ Created regions with coordinates CSV: {csv_path}")
     return regions_df
 
-def validate_centroids_across_atlases():
-    """Validate that centroids match between sequential and original atlases"""
+def load_reindex_lut(path):
+    """Old index -> new index lookup table from a reindexing_map.json
+    
+    Old indices missing from the map are -1. Parsed with orjson when it is
+    installed (json.loads also takes the raw bytes).
+    """
+    loads = orjson.loads if orjson is not None else json.loads
+    reindex_map = loads(Path(path).read_bytes())
+    lut = np.full(max(map(int, reindex_map), default=0) + 1, -1, dtype=np.int32)
+    for old_idx, new_idx in reindex_map.items():
+        lut[int(old_idx)] = new_idx
+    return lut
+
+def take_or(table, idx, fill):
+    """table[idx], with fill where idx is past the end of table"""
+    out = np.full(idx.shape, fill, dtype=table.dtype)
+    inside = idx < table.size
+    out[inside] = table[idx[inside]]
+    return out
+
+def validate_source(source, data, affine, original_indices, offset, reindex_lut, seq_centroids):
+    """Validation table comparing one source atlas's centroids with the sequential atlas
+    
+    original_indices are labels in the source atlas and offset maps them to
+    the old indices used in reindex_lut. Centroids come from one labeled pass
+    over data; regions that are missing from the source atlas, reindex_lut or
+    the sequential atlas are skipped.
+    """
+    counts, com_voxel = compute_label_centroids(data)
+    
+    # Map and filter all candidate indices at once through the lookup tables
+    original_idx = np.asarray(original_indices, dtype=np.int64)
+    old_idx = original_idx + offset
+    new_idx = take_or(reindex_lut, old_idx, -1)
+    keep = (new_idx >= 0) & (take_or(counts, original_idx, 0) > 0)
+    keep[keep] = [bool(seq_centroids.get(i)) for i in new_idx[keep]]
+    if not keep.any():
+        return pd.DataFrame()
+    original_idx, old_idx, new_idx = original_idx[keep], old_idx[keep], new_idx[keep]
+    
+    com_mni = voxel_to_mni(com_voxel[original_idx], affine)
+    seq_mni = np.array([[seq_centroids[i]['mni_x'], seq_centroids[i]['mni_y'], seq_centroids[i]['mni_z']]
+                        for i in new_idx])
+    distances = np.linalg.norm(com_mni - seq_mni, axis=1)
+    
+    # Round whole columns at once rather than value by value
+    com_mni, seq_mni = np.round(com_mni, 1), np.round(seq_mni, 1)
+    
+    # Build the table column-wise rather than as one dict per region
+    return pd.DataFrame({
+        'source': source,
+        'old_index': old_idx,
+        'new_index': new_idx,
+        'original_x': com_mni[:, 0],
+        'original_y': com_mni[:, 1],
+        'original_z': com_mni[:, 2],
+        'sequential_x': seq_mni[:, 0],
+        'sequential_y': seq_mni[:, 1],
+        'sequential_z': seq_mni[:, 2],
+        'distance_mm': np.round(distances, 2),
+        'match_status': np.where(distances < 2.0, 'MATCH', 'MISMATCH')
+    })
+
+def validate_centroids_across_atlases(seq_centroids, seq_atlas_path):
+    """Validate that centroids match between sequential and original atlases
+    
+    seq_centroids are the extract_region_centroids results for seq_atlas_path,
+    computed once by the caller.
+    """
     
     print("\n🔍 VALIDATING REGION CENTROIDS ACROSS ATLASES")
     print("=" * 50)
@@ -222,13 +326,7 @@ def validate_centroids_across_atlases():
     val_dir.mkdir(exist_ok=True)
     
     # Load reindexing map
-    with open("levtiades_atlas/reindexing_map.json", 'r') as f:
-        reindex_map = json.load(f)
-    reindex_map = {int(k): v for k, v in reindex_map.items()}
-    
-    # Load sequential atlas centroids
-    seq_atlas_path = Path("levtiades_atlas/final_atlas/no_overlaps/levtiades_sequential.nii.gz")
-    seq_centroids = extract_region_centroids(seq_atlas_path)
+    reindex_lut = load_reindex_lut("levtiades_atlas/reindexing_map.json")
     
     # Load original aligned atlases
     aligned_dir = Path("levtiades_atlas/aligned_atlases")
@@ -239,145 +337,48 @@ def validate_centroids_across_atlases():
     print("\n📍 Validating Levinson Regions...")
     levinson_path = aligned_dir / "levinson_combined_aligned.nii.gz"
     if levinson_path.exists():
-        levinson_img = nib.load(levinson_path)
-        levinson_data = levinson_img.get_fdata().astype(int)
-        levinson_affine = levinson_img.affine
-        
-        for old_idx in range(1, 6):
-            if old_idx in reindex_map:
-                new_idx = reindex_map[old_idx]
-                
-                # Get centroid from original Levinson
-                mask = levinson_data == old_idx
-                if np.any(mask):
-                    com_voxel = ndimage.center_of_mass(mask)
-                    com_mni = nib.affines.apply_affine(levinson_affine, com_voxel)
-                    
-                    # Compare with sequential atlas
-                    seq_coord = seq_centroids.get(new_idx, {})
-                    
-                    if seq_coord:
-                        distance = np.sqrt(
-                            (com_mni[0] - seq_coord['mni_x'])**2 +
-                            (com_mni[1] - seq_coord['mni_y'])**2 +
-                            (com_mni[2] - seq_coord['mni_z'])**2
-                        )
-                        
-                        validation_results.append({
-                            'source': 'Levinson',
-                            'old_index': old_idx,
-                            'new_index': new_idx,
-                            'original_x': round(com_mni[0], 1),
-                            'original_y': round(com_mni[1], 1),
-                            'original_z': round(com_mni[2], 1),
-                            'sequential_x': round(seq_coord['mni_x'], 1),
-                            'sequential_y': round(seq_coord['mni_y'], 1),
-                            'sequential_z': round(seq_coord['mni_z'], 1),
-                            'distance_mm': round(distance, 2),
-                            'match_status': 'MATCH' if distance < 2.0 else 'MISMATCH'
-                        })
+        levinson_img, levinson_data = load_atlas(levinson_path)
+        validation_results.append(validate_source(
+            'Levinson', levinson_data, levinson_img.affine, range(1, 6), 0,
+            reindex_lut, seq_centroids))
     
     # 2. Validate Tian regions (101-154 -> 6-59)
     print("\n📍 Validating Tian Regions...")
     tian_path = aligned_dir / "tian_aligned.nii.gz"
     if tian_path.exists():
-        tian_img = nib.load(tian_path)
-        tian_data = tian_img.get_fdata().astype(int)
-        tian_affine = tian_img.affine
-        
-        for original_tian_idx in range(1, 55):  # Tian uses 1-54
-            old_idx = original_tian_idx + 100  # Our mapping uses 101-154
-            if old_idx in reindex_map:
-                new_idx = reindex_map[old_idx]
-                
-                # Get centroid from original Tian
-                mask = tian_data == original_tian_idx
-                if np.any(mask):
-                    com_voxel = ndimage.center_of_mass(mask)
-                    com_mni = nib.affines.apply_affine(tian_affine, com_voxel)
-                    
-                    # Compare with sequential atlas
-                    seq_coord = seq_centroids.get(new_idx, {})
-                    
-                    if seq_coord:
-                        distance = np.sqrt(
-                            (com_mni[0] - seq_coord['mni_x'])**2 +
-                            (com_mni[1] - seq_coord['mni_y'])**2 +
-                            (com_mni[2] - seq_coord['mni_z'])**2
-                        )
-                        
-                        validation_results.append({
-                            'source': 'Tian',
-                            'old_index': old_idx,
-                            'new_index': new_idx,
-                            'original_x': round(com_mni[0], 1),
-                            'original_y': round(com_mni[1], 1),
-                            'original_z': round(com_mni[2], 1),
-                            'sequential_x': round(seq_coord['mni_x'], 1),
-                            'sequential_y': round(seq_coord['mni_y'], 1),
-                            'sequential_z': round(seq_coord['mni_z'], 1),
-                            'distance_mm': round(distance, 2),
-                            'match_status': 'MATCH' if distance < 2.0 else 'MISMATCH'
-                        })
+        tian_img, tian_data = load_atlas(tian_path)
+        # Tian uses 1-54, our mapping uses 101-154
+        validation_results.append(validate_source(
+            'Tian', tian_data, tian_img.affine, range(1, 55), 100,
+            reindex_lut, seq_centroids))
     
     # 3. Validate Destrieux regions (sample check)
     print("\n📍 Validating Destrieux Regions (sample)...")
     destrieux_path = aligned_dir / "destrieux_aligned.nii.gz"
     if destrieux_path.exists():
-        des_img = nib.load(destrieux_path)
-        des_data = des_img.get_fdata().astype(int)
-        des_affine = des_img.affine
-        
-        # Check first 10 and last 10 Destrieux regions
-        des_indices_to_check = list(range(1, 11)) + list(range(140, 151))
+        des_img, des_data = load_atlas(destrieux_path)
         
-        for original_des_idx in des_indices_to_check:
-            if original_des_idx not in [0, 42, 117]:  # Skip removed regions
-                old_idx = original_des_idx + 200  # Our mapping uses 201+
-                if old_idx in reindex_map:
-                    new_idx = reindex_map[old_idx]
-                    
-                    # Get centroid from original Destrieux
-                    mask = des_data == original_des_idx
-                    if np.any(mask):
-                        com_voxel = ndimage.center_of_mass(mask)
-                        com_mni = nib.affines.apply_affine(des_affine, com_voxel)
-                        
-                        # Compare with sequential atlas
-                        seq_coord = seq_centroids.get(new_idx, {})
-                        
-                        if seq_coord:
-                            distance = np.sqrt(
-                                (com_mni[0] - seq_coord['mni_x'])**2 +
-                                (com_mni[1] - seq_coord['mni_y'])**2 +
-                                (com_mni[2] - seq_coord['mni_z'])**2
-                            )
-                            
-                            validation_results.append({
-                                'source': 'Destrieux',
-                                'old_index': old_idx,
-                                'new_index': new_idx,
-                                'original_x': round(com_mni[0], 1),
-                                'original_y': round(com_mni[1], 1),
-                                'original_z': round(com_mni[2], 1),
-                                'sequential_x': round(seq_coord['mni_x'], 1),
-                                'sequential_y': round(seq_coord['mni_y'], 1),
-                                'sequential_z': round(seq_coord['mni_z'], 1),
-                                'distance_mm': round(distance, 2),
-                                'match_status': 'MATCH' if distance < 2.0 else 'MISMATCH'
-                            })
+        # Check first 10 and last 10 Destrieux regions, skipping removed regions
+        des_indices_to_check = [i for i in list(range(1, 11)) + list(range(140, 151))
+                                if i not in [0, 42, 117]]
+        # Our mapping uses 201+
+        validation_results.append(validate_source(
+            'Destrieux', des_data, des_img.affine, des_indices_to_check, 200,
+            reindex_lut, seq_centroids))
     
     # Save validation results
-    val_df = pd.DataFrame(validation_results)
+    frames = [df for df in validation_results if len(df)]
+    val_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
     val_csv_path = val_dir / "centroid_validation_results.csv"
-    val_df.to_csv(val_csv_path, index=False)
+    write_csv(val_df, val_csv_path)
     
     print(f"\n✅ Validation results saved: {val_csv_path}")
     
     # Summary statistics
-    total_checked = len(validation_results)
-    matches = len([r for r in validation_results if r['match_status'] == 'MATCH'])
-    mismatches = total_checked - matches
+    total_checked = len(val_df)
+    mismatched = val_df[val_df['match_status'] == 'MISMATCH'] if total_checked else val_df
+    mismatches = len(mismatched)
+    matches = total_checked - mismatches
     
     print(f"\n📊 VALIDATION SUMMARY:")
     print(f"   Total regions checked: {total_checked}")
@@ -403,9 +404,10 @@ def validate_centroids_across_atlases():
         
         if mismatches > 0:
             f.write("MISMATCHED REGIONS:\n")
-            for _, row in val_df[val_df['match_status'] == 'MISMATCH'].iterrows():
-                f.write(f"- {row['source']} region {row['old_index']} -> {row['new_index']}: ")
-                f.write(f"{row['distance_mm']}mm difference\n")
+            f.writelines(
+                f"- {row.source} region {row.old_index} -> {row.new_index}: {row.distance_mm}mm difference\n"
+                for row in mismatched[['source', 'old_index', 'new_index', 'distance_mm']].itertuples(index=False)
+            )
     
     print(f"✅ Validation report saved: {report_path}")
     
@@ -416,7 +418,7 @@ if __name__ == "__main__":
     print("=" * 55)
     
     # Step 1: Fix formatting
-    fix_label_file_formatting()
+    label_text, lookup_text = fix_label_file_formatting()
     
     # Step 2: Rename atlas files
     rename_atlas_files()
@@ -426,12 +428,12 @@ if __name__ == "__main__":
     centroids = extract_region_centroids(seq_atlas_path)
     
     # Step 4: Create CSV files
-    labels_df = create_labels_csv()
-    lookup_df = create_lookup_table_csv()
+    labels_df = create_labels_csv(label_text)
+    lookup_df = create_lookup_table_csv(lookup_text)
     regions_df = create_regions_with_coordinates_csv(labels_df, centroids)
     
     # Step 5: Validate centroids
-    validation_df = validate_centroids_across_atlases()
+    validation_df = validate_centroids_across_atlases(centroids, seq_atlas_path)
     
     print("\n✅ ALL TASKS COMPLETE!")
     print("=" * 25)